@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from typing import Callable
+
+import numpy
+
+from business import schema
+from business.matrix import Matrix
+from business.decoding import Decoder
+from business.encoding import Encoder
+from business.physics import Nuclei, Reaction
+
+
+SIZES     = [256, 1024, 4096]
+CASES     = [(0, 0), (2, 4), (6, 16)]  # locuses count, peaks per spectrum
+FRAGMENTS = [(1, 1), (1, 2), (1, 3), (2, 3), (2, 4), (3, 6)]
+
+VERSIONS  = [1, 2]
+MODES     = {'read': False, 'mapped': True}
+
+# Operation is a pair of untimed preparation from file path, format
+# version and mapped mode, and timed call. Files are written in version
+# of measured file, so the file is not converted between runs.
+# Summing of matrix touches every page of mapped file.
+OPERATIONS: dict[str, tuple[Callable, Callable]] = {
+    'decoder':        (lambda path, version, mapped: (path, mapped), lambda state: Decoder(*state)),
+    'get_matrix':     (lambda path, version, mapped: Decoder(path, mapped), lambda decoder: decoder.get_matrix()),
+    'sum_matrix':     (lambda path, version, mapped: Decoder(path, mapped), lambda decoder: decoder.get_matrix().sum()),
+    'take_locuses':   (lambda path, version, mapped: Decoder(path, mapped), lambda decoder: decoder.take_locuses()),
+    'take_spectrums': (lambda path, version, mapped: Decoder(path, mapped), lambda decoder: decoder.take_spectrums()),
+    'matrix':         (lambda path, version, mapped: (path, mapped), lambda state: Matrix(Decoder(*state))),
+    'write_down':     (lambda path, version, mapped: Encoder(Matrix(Decoder(path, mapped)), version=version), lambda encoder: encoder.write_down(incremental=False)),
+    'patch_down':     (lambda path, version, mapped: Encoder(Matrix(Decoder(path, mapped)), version=version), lambda encoder: encoder.write_down(incremental=True)),
+}
+
+
+def synthesize(size: int, locuses: int, peaks: int, seed: int = 0) -> bytearray:
+    '''
+    Version 1 dSigma file of 12C + 4He reaction with square matrix
+    and rectangular locuses. Count of peaks is limited by known
+    states of residual nuclei.
+    '''
+    rng = numpy.random.default_rng(seed)
+    matrix = (rng.random((size, size)) < 0.2) * rng.integers(0, 50, (size, size))
+
+    header = {
+        'beam_charge': 2, 'beam_nuclons': 4, 'target_charge': 6, 'target_nuclons': 12,
+        'beam_energy': 50.0, 'detector_angle': 20.0,
+        'e_detector_thickness': 1000.0, 'e_detector_madeof': b'si  ', 'e_detector_resolution': 20.0,
+        'de_detector_thickness': 50.0, 'de_detector_madeof': b'si  ', 'de_detector_resolution': 30.0,
+        'integrator_counts': 1000, 'coincidence': int(matrix.sum()), 'integrator_constant': 1e-10,
+        'collimator_radius': 1.0, 'target_detector_distance': 360.0,
+        'e_size': size, 'de_size': size
+    }
+
+    buffer = bytearray(schema.HEADER.pack(header))
+    buffer += matrix.astype(schema.MATRIX_CELL).tobytes()
+
+    fragments = FRAGMENTS[:locuses]
+    corners = [(2, 2), (size - 3, 2), (size - 3, size - 3), (2, size - 3), (2, 2)]
+
+    buffer += schema.LOCUSES.pack({'locuses_count': len(fragments)})
+    for charge, nuclons in fragments:
+        buffer += schema.LOCUS.pack({'charge': charge, 'nuclons': nuclons, 'points_count': len(corners)})
+        buffer += numpy.array(corners, dtype=schema.POINT).tobytes()
+
+    for charge, nuclons in fragments:
+        # Peaks must belong to states of residual nuclei.
+        states = Reaction(Nuclei(2, 4), Nuclei(6, 12), Nuclei(charge, nuclons), 50.0).residual_states[:peaks]
+
+        records = numpy.zeros(len(states), dtype=schema.PEAK)
+        records['state'] = states
+        records['center'] = numpy.linspace(10, size - 10, len(states))
+        records['fwhm'] = 3.0
+        records['area'] = 100.0
+        records['gauss_or_lorentz'] = numpy.arange(len(states)) % 2
+
+        buffer += schema.SPECTRUM.pack({'charge': charge, 'nuclons': nuclons, 'calib_e0': 1.0, 'calib_k': 0.05, 'peaks_count': len(states)})
+        buffer += records.tobytes()
+
+    return buffer
+
+def convert(path: str, version: int) -> str:
+    '''
+    Copy of version 1 file saved in given version with default codecs.
+    '''
+    if version == 1:
+        return path
+
+    converted = path.replace('.ds', f'_v{version}.ds')
+    Encoder(Matrix(Decoder(path)), version=version).write_down(incremental=False, path=converted)
+
+    return converted
+
+def measure(path: str, version: int, mapped: bool, operation: str, repeat: int) -> dict[str, float]:
+    '''
+    Best time of operation over repeats and peak of
+    memory, allocated by it, in one more traced run.
+    '''
+    prepare, run = OPERATIONS[operation]
+
+    timings = []
+    for _ in range(repeat):
+        state = prepare(path, version, mapped)
+        start = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - start)
+
+    state = prepare(path, version, mapped)
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = min(timings)
+    size = os.path.getsize(path)
+
+    return {
+        'seconds': seconds,
+        'mb_per_s': size / seconds / 1e6 if seconds > 0 else None,
+        'peak_memory_bytes': peak
+    }
+
+def run_suite(sizes: list[int], versions: list[int], modes: list[str], operations: list[str], repeat: int) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            for locuses, peaks in CASES:
+                path = os.path.join(directory, f'{size}_{locuses}_{peaks}.ds')
+                with open(path, 'wb') as binary:
+                    binary.write(synthesize(size, locuses, peaks))
+
+                for version in versions:
+                    measured = convert(path, version)
+
+                    for mode in modes:
+                        for operation in operations:
+                            record = {
+                                'size': size, 'locuses': locuses, 'peaks': peaks,
+                                'version': version, 'mapped': MODES[mode],
+                                'file_bytes': os.path.getsize(measured), 'operation': operation
+                            }
+                            record.update(measure(measured, version, MODES[mode], operation, repeat))
+                            results.append(record)
+
+                            print(f'{size}x{size}, {locuses} locuses, {peaks} peaks, v{version} {mode}, {operation}: {record["seconds"]:.4f} s', file=sys.stderr)
+
+    return {
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'results': results
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Throughput of dSigma file decoding and encoding. Run from directory with ensdf.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--versions', type=int, nargs='+', choices=VERSIONS, default=VERSIONS)
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--operations', nargs='+', choices=list(OPERATIONS), default=list(OPERATIONS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='JSON file for results, standard output by default.')
+    arguments = parser.parse_args()
+
+    report = run_suite(arguments.sizes, arguments.versions, arguments.modes, arguments.operations, arguments.repeat)
+
+    if arguments.output is None:
+        json.dump(report, sys.stdout, indent=2)
+    else:
+        with open(arguments.output, 'w') as file:
+            json.dump(report, file, indent=2)
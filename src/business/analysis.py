@@ -16,6 +16,11 @@ class Spectrum:
         self.__scale_value = 0
 
         self.__peaks: dict[float, PeakFunction] = dict()
+        self.__is_dirty = False
+
+    @property
+    def is_dirty(self) -> bool:
+        return self.__is_dirty
 
     @property
     def is_calibrated(self) -> bool:
@@ -58,6 +63,7 @@ class Spectrum:
     def scale_shift(self, val: float) -> None:
         self.__scale_shift = val
         self.__peaks.clear()
+        self.__is_dirty = True
 
     @property
     def scale_value(self) -> float:
@@ -70,6 +76,7 @@ class Spectrum:
         
         self.__scale_value = val
         self.__peaks.clear()
+        self.__is_dirty = True
 
     @property
     def peaks(self) -> dict[float, PeakFunction]:
@@ -96,6 +103,10 @@ class Spectrum:
             raise ValueError(f'There is no state of residual nuclei of reaction same as {state}')
         
         self.__peaks[state] = peak
+        self.__is_dirty = True
+
+    def clean(self) -> None:
+        self.__is_dirty = False
 
 
 class SpectrumAnalyzer:
@@ -132,7 +143,7 @@ class SpectrumAnalyzer:
         if not spectrum.is_calibrated:
             raise ValueError('Spectrum must be calibrated before finding peaks')
         
-        theories = self.theory_peaks(index)
+        theories = numpy.array(self.theory_peaks(index))
 
         e_detector = spectrum.electronics.e_detector
         de_detector = spectrum.electronics.de_detector
@@ -143,40 +154,30 @@ class SpectrumAnalyzer:
         de_bete_bloch = Struggling(spectrum.reaction.fragment, de_detector.madeof_nuclei)
         e_bete_bloch = Struggling(spectrum.reaction.fragment, e_detector.madeof_nuclei)
 
-        collected = []
-        for i in range(len(theories)):
-            k, e0 = spectrum.scale_value, spectrum.scale_shift
-
-            de_loss = de_bete_bloch.energy_loss(theories[i], de_detector_thick, de_detector.density)
-            remain_energy = theories[i] - de_loss
+        # Losses of all theory peaks are found at once.
+        remain_energy = de_bete_bloch.residual_energy(theories, de_detector_thick, de_detector.density)
+        remain_energy = e_bete_bloch.residual_energy(remain_energy, e_detector_thick, e_detector.density)
 
-            e_loss = e_bete_bloch.energy_loss(remain_energy, e_detector_thick, e_detector.density)
-            remain_energy -= e_loss
+        k, e0 = spectrum.scale_value, spectrum.scale_shift
+        with numpy.errstate(invalid='ignore'):
+            pretend_channels = ((remain_energy - e0) / k).astype(numpy.int64)
 
-            if remain_energy <= 0:
-                continue
-
-            pretend_channel = int((remain_energy - e0) / k)
-            if pretend_channel <= len(self.spectrums[index].data) * 0.02:
-                continue
+        is_visible = (remain_energy > 0) & (pretend_channels > len(spectrum.data) * 0.02)
 
-            collected.append(PeakAnalyzer(spectrum.data, pretend_channel))
-
-        return collected
+        return [PeakAnalyzer(spectrum.data, int(channel)) for channel in pretend_channels[is_visible]]
     
     def theory_peaks(self, index: int) -> list[float]:
+        '''
+        Fragment energies of residual states up to the first forbidden one.
+        '''
         current = self.spectrums[index]
+        energies = current.reaction.tabulated_energies(current.angle)[0]
 
-        peaks = []
-        for state in current.reaction.residual_states:
-            fragment_energy = current.reaction.fragment_energy(state, current.angle)
-            if numpy.isnan(fragment_energy) or numpy.isinf(fragment_energy):
-                break
+        forbidden = numpy.flatnonzero(~numpy.isfinite(energies))
+        stop = forbidden[0] if len(forbidden) != 0 else len(energies)
 
-            peaks.append(fragment_energy)
+        return energies[:stop].tolist()
 
-        return peaks
-    
     def calibrate(self, index: int, anchors_indexes: tuple[int], states: tuple[float]) -> None:
         current = self.spectrums[index]
 
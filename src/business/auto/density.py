@@ -3,7 +3,7 @@ import numpy
 
 class DensityMatrix:
     def __init__(self, matrix: numpy.ndarray, averaging: bool = False, adding_up: bool = True, zero_encount_limit: int = 9) -> None:
-        self._matrix = matrix
+        self._matrix = numpy.asarray(matrix)
         self._density = numpy.array([], dtype=numpy.int32)
 
         if averaging ^ adding_up:
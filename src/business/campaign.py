@@ -0,0 +1,54 @@
+import os
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from business.matrix import Matrix
+from business.decoding import Decoder
+
+
+class CampaignLoader:
+    '''
+    Loader of all dSigma files of angle scan.\n
+    Files are decoded in threads. Reading of files and vectorized projection
+    of locuses to spectrums are done in numpy and file calls, which release GIL.
+    Progress is reported by callback with (loaded, total) arguments
+    from the thread, that called loading.
+    '''
+    def __init__(self, paths: list[str], workers: int = None, mapped: bool = False, sparse: bool = False,
+                 progress: Callable[[int, int], None] = None, relativistic: bool = False) -> None:
+        self.paths = paths
+        self.workers = workers if workers is not None else min(len(paths), os.cpu_count() or 1, 8)
+        self.mapped = mapped
+        self.relativistic = relativistic
+        self.sparse = sparse
+        self.progress = progress
+
+    def load(self) -> list[Matrix]:
+        matrixes = self.__run(lambda path: Matrix(Decoder(path, self.mapped, self.relativistic), self.sparse))
+        return sorted(matrixes, key=lambda x: x.angle)
+
+    def collect(self, task: Callable[[Decoder], object]) -> list:
+        '''
+        Results of task over decoder of every file. Decoder is dropped as soon
+        as its task is done, so only files being decoded are kept in memory.
+        '''
+        return self.__run(lambda path: task(Decoder(path, self.mapped, self.relativistic)))
+
+    def __run(self, task: Callable[[str], object]) -> list:
+        if len(self.paths) == 0:
+            return []
+
+        collected = []
+        with ThreadPoolExecutor(max(self.workers, 1)) as pool:
+            futures = [pool.submit(task, path) for path in self.paths]
+
+            for future in as_completed(futures):
+                collected.append(future.result())
+                if self.progress is not None:
+                    self.progress(len(collected), len(self.paths))
+
+        return collected
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import os
+import json
+from typing import Callable
+
+from business.decoding import Decoder
+from business.campaign import CampaignLoader
+
+
+CATALOG_NAME = 'dSigma-catalog.json'
+CATALOG_VERSION = 1
+
+
+class CatalogEntry:
+    '''
+    Header fields and summary of one dSigma file,
+    valid while size and modification time of file are the same.
+    '''
+    def __init__(self, path: str, size: int, mtime: int, beam: tuple[int, int], target: tuple[int, int],
+                 energy: float, angle: float, counts: int, locuses: list[tuple[int, int]]) -> None:
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.beam = beam
+        self.target = target
+        self.energy = energy
+        self.angle = angle
+        self.counts = counts
+        self.locuses = locuses
+
+    def __repr__(self) -> str:
+        return f'CatalogEntry({os.path.basename(self.path)}, angle: {self.angle})'
+
+    def is_actual(self) -> bool:
+        if not os.path.isfile(self.path):
+            return False
+
+        stat = os.stat(self.path)
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime
+
+    def to_json(self) -> dict:
+        return {
+            'size': self.size, 'mtime': self.mtime,
+            'beam': list(self.beam), 'target': list(self.target),
+            'energy': self.energy, 'angle': self.angle,
+            'counts': self.counts, 'locuses': [list(n) for n in self.locuses]
+        }
+
+    @staticmethod
+    def from_json(path: str, fields: dict) -> CatalogEntry:
+        return CatalogEntry(
+            path, fields['size'], fields['mtime'],
+            tuple(fields['beam']), tuple(fields['target']),
+            fields['energy'], fields['angle'],
+            fields['counts'], [tuple(n) for n in fields['locuses']]
+        )
+
+    @staticmethod
+    def from_decoder(decoder: Decoder) -> CatalogEntry:
+        stat = os.stat(decoder.path)
+        experiment = decoder.get_experiment()
+
+        return CatalogEntry(
+            decoder.path, stat.st_size, stat.st_mtime_ns,
+            (experiment.beam.charge, experiment.beam.nuclons),
+            (experiment.target.charge, experiment.target.nuclons),
+            experiment.beam_energy, decoder.get_angle(),
+            int(decoder.get_matrix().sum()),
+            [(n.charge, n.nuclons) for n in decoder.take_locuses()]
+        )
+
+
+class Catalog:
+    '''
+    Sidecar catalog of directory with dSigma files.\n
+    Only files, that are new or changed since last listing, are decoded.
+    Files are mapped and every entry is built right after its file is
+    decoded, so contents of files are not held in memory together.
+    '''
+    def __init__(self, directory: str, paths: list[str]) -> None:
+        self.directory = directory
+        self.paths = paths
+        self.__entries: dict[str, CatalogEntry] = self.__read()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, CATALOG_NAME)
+
+    def entries(self, progress: Callable[[int, int], None] = None) -> list[CatalogEntry]:
+        '''
+        Entries of all files sorted by angle.
+        '''
+        self.refresh(progress)
+        return sorted([self.__entries[path] for path in self.paths], key=lambda x: x.angle)
+
+    def refresh(self, progress: Callable[[int, int], None] = None) -> None:
+        stale = [path for path in self.paths if path not in self.__entries or not self.__entries[path].is_actual()]
+        if len(stale) == 0 and set(self.__entries) == set(self.paths):
+            return
+
+        for entry in CampaignLoader(stale, mapped=True, progress=progress).collect(CatalogEntry.from_decoder):
+            self.__entries[entry.path] = entry
+
+        self.__entries = {path: self.__entries[path] for path in self.paths}
+        self.save()
+
+    def save(self) -> None:
+        files = {os.path.basename(path): self.__entries[path].to_json() for path in self.__entries}
+
+        try:
+            with open(self.path, 'w') as file:
+                json.dump({'version': CATALOG_VERSION, 'files': files}, file)
+        except OSError:
+            pass
+
+    def __read(self) -> dict[str, CatalogEntry]:
+        try:
+            with open(self.path, 'r') as file:
+                content = json.load(file)
+        except (OSError, ValueError):
+            return dict()
+
+        if not isinstance(content, dict) or content.get('version') != CATALOG_VERSION:
+            return dict()
+
+        names = {os.path.basename(path): path for path in self.paths}
+
+        collected = dict()
+        for name, fields in content.get('files', dict()).items():
+            if name not in names:
+                continue
+
+            try:
+                collected[names[name]] = CatalogEntry.from_json(names[name], fields)
+            except (KeyError, TypeError):
+                continue
+
+        return collected
+
+
+if __name__ == '__main__':
+    pass
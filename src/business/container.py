@@ -0,0 +1,134 @@
+import lzma
+import zlib
+import struct
+
+
+# Version 2 of dSigma file is a container of sections.
+# Beam charge can not be 137, so first byte separates it from version 1.
+MAGIC   = b'\x89DSG'
+VERSION = 2
+
+PREAMBLE = struct.Struct('<4sHH')   # magic, version, sections count
+ENTRY    = struct.Struct('<BBQQQ')  # section id, codec id, offset, stored length, raw length
+
+SECTIONS = ['header', 'matrix', 'locuses', 'spectrums', 'pyramid']
+CODECS   = ['none', 'zlib', 'lzma']
+
+# Sections, that every file has, and order of sections in file.
+# Pyramid precedes locuses and spectrums, so they stay at the tail of file.
+REQUIRED = ['header', 'matrix', 'locuses', 'spectrums']
+LAYOUT   = ['header', 'matrix', 'pyramid', 'locuses', 'spectrums']
+
+# Compact codecs are default. Mapped codecs keep matrix raw,
+# so mapped decoding touches only needed pages of it.
+DEFAULT_CODECS = {'header': 'none', 'matrix': 'zlib', 'locuses': 'none', 'spectrums': 'none', 'pyramid': 'zlib'}
+MAPPED_CODECS  = DEFAULT_CODECS | {'matrix': 'none'}
+
+
+class Section:
+    '''
+    Entry of sections table of container.
+    '''
+    def __init__(self, name: str, codec: str, offset: int, length: int, raw_length: int) -> None:
+        self.name = name
+        self.codec = codec
+        self.offset = offset
+        self.length = length
+        self.raw_length = raw_length
+
+    def __repr__(self) -> str:
+        return f'Section({self.name}, {self.codec}, offset: {self.offset}, length: {self.length})'
+
+
+def is_container(buffer) -> bool:
+    return len(buffer) >= PREAMBLE.size and bytes(buffer[:len(MAGIC)]) == MAGIC
+
+def read_table(buffer, file_size: int = None) -> dict[str, Section]:
+    '''
+    Reads sections table. Buffer may hold only preamble and table,
+    then the size of whole file must be passed to check bounds.
+    '''
+    file_size = len(buffer) if file_size is None else file_size
+    magic, version, count = PREAMBLE.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError('Buffer is not a dSigma container.')
+
+    if version != VERSION:
+        raise ValueError(f'Unsupported version of dSigma file: {version}.')
+
+    table = dict()
+    for i in range(count):
+        section_id, codec_id, offset, length, raw_length = ENTRY.unpack_from(buffer, PREAMBLE.size + i * ENTRY.size)
+        if section_id >= len(SECTIONS) or codec_id >= len(CODECS):
+            continue
+
+        if offset + length > file_size:
+            raise ValueError(f'Section {SECTIONS[section_id]} is out of file bounds.')
+
+        table[SECTIONS[section_id]] = Section(SECTIONS[section_id], CODECS[codec_id], offset, length, raw_length)
+
+    return table
+
+def unpack_section(buffer, section: Section) -> memoryview | bytes:
+    '''
+    Returns content of section. Uncompressed sections are
+    returned as view over buffer without copying.
+    '''
+    stored = memoryview(buffer)[section.offset: section.offset + section.length]
+
+    match section.codec:
+        case 'none': return stored
+        case 'zlib': content = zlib.decompress(stored)
+        case 'lzma': content = lzma.decompress(stored)
+        case _: raise ValueError(f'Unknown codec of section: {section.codec}.')
+
+    if len(content) != section.raw_length:
+        raise ValueError(f'Section {section.name} is corrupted.')
+
+    return content
+
+def compress(content: bytes, codec: str) -> bytes:
+    match codec:
+        case 'none': return content
+        case 'zlib': return zlib.compress(content)
+        case 'lzma': return lzma.compress(content)
+
+    raise ValueError(f'Unknown codec of section: {codec}.')
+
+def table_size(count: int) -> int:
+    return PREAMBLE.size + count * ENTRY.size
+
+def pack_table(table: dict[str, Section]) -> bytearray:
+    names = [name for name in SECTIONS if name in table]
+
+    buffer = bytearray(table_size(len(names)))
+    PREAMBLE.pack_into(buffer, 0, MAGIC, VERSION, len(names))
+
+    for i in range(len(names)):
+        section = table[names[i]]
+        entry = (SECTIONS.index(section.name), CODECS.index(section.codec), section.offset, section.length, section.raw_length)
+        ENTRY.pack_into(buffer, PREAMBLE.size + i * ENTRY.size, *entry)
+
+    return buffer
+
+def pack(sections: dict[str, bytes], codecs: dict[str, str] = None) -> bytearray:
+    '''
+    Packs sections to container in order of LAYOUT list.
+    '''
+    codecs = DEFAULT_CODECS | (codecs or dict())
+    names = [name for name in LAYOUT if name in sections]
+
+    table = dict()
+    stored = []
+    offset = table_size(len(names))
+
+    for name in names:
+        stored.append(compress(bytes(sections[name]), codecs[name]))
+        table[name] = Section(name, codecs[name], offset, len(stored[-1]), len(sections[name]))
+        offset += len(stored[-1])
+
+    return pack_table(table) + b''.join(stored)
+
+
+if __name__ == '__main__':
+    pass
@@ -1,197 +1,294 @@
-import struct
+import os
+import mmap
 import numpy
+from typing import BinaryIO
 
+from business import schema, container
 from business.locus import Locus
+from business.sparse import SparseMatrix
+from business.pyramid import Pyramid
 from business.analysis import Spectrum
 from business.electronics import Telescope, Detector
 from business.physics import Nuclei, PhysicalExperiment
 from business.peaks import PeakFunction, Gaussian, Lorentzian
 
 
-# Physics area
-BEAM_CHARGE              = 0
-BEAM_NUCLON              = 1
-TARGET_CHARGE            = 2
-TARGET_NUCLON            = 3
-BEAM_ENERGY              = 4
-DETECTOR_ANGLE           = 8
-# Electronics area
-E_DETECTOR_THICKNESS     = 12
-E_DETECTOR_MADEOF        = 16
-E_DETECTOR_RESOLUTION    = 20
-DE_DETECTOR_THICKNESS    = 24
-DE_DETECTOR_MADEOF       = 28
-DE_DETECTOR_RESOLUTION   = 32
-# Cross-section valuable, details area
-INTEGRATOR_COUNTS        = 36
-COINCIDENCE              = 40
-INTEGRATOR_CONSTANT      = 44
-COLLIMATOR_RADIUS        = 48
-TARGET_DETECTOR_DISTANCE = 52
-# Matrix area
-E_SIZE                   = 56
-DE_SIZE                  = 58
-MATRIX_START             = 60
-# Dynamic area, locuses and spectres
-LOCUSES_START = lambda height, width: MATRIX_START + 4 * height * width
-
-
 class Decoder:
-    def __init__(self, path: str) -> None:
-        self.path = path
-        with open(path, 'rb') as file:
-            self.buffer = file.read()
+    def __init__(self, source: str | bytes | memoryview | BinaryIO, mapped: bool = False, relativistic: bool = False) -> None:
+        '''
+        Decoder of dSigma file, in-memory buffer or binary stream.\n
+        In mapped mode file is memory-mapped instead of being read,
+        so matrix pages are loaded from disk only when they are touched.
+        Buffers and BytesIO are decoded in place without copying,
+        other streams are read up to their end. Decoded matrix is
+        read-only view even over writable buffer. BytesIO stays locked
+        while decoder holds its buffer, writing to it raises BufferError.
+        Kinematics is not stored in file, experiment of relativistic
+        decoder and its reactions use relativistic kinematics.
+        '''
+        self.path = os.fspath(source) if isinstance(source, (str, os.PathLike)) else None
+        self.is_mapped = mapped and self.path is not None
+        self.relativistic = relativistic
+        self.buffer = self.__load(source)
+
+        self.__matrix: numpy.ndarray = None
+        self.__pyramid: Pyramid = None
+        self.__locuses: dict[Nuclei, list[tuple[int, int]]] = None
+        self.__spectrums: list[tuple[Nuclei, float, float, list[tuple[float, PeakFunction]]]] = None
+
+        self.version = 2 if container.is_container(self.buffer) else 1
+        self.__areas: dict[str, memoryview | bytes] = dict()
+        self.__sections = self.__index_sections()
+        self.__header = schema.HEADER.unpack(self.__area('header'))
 
     @property
-    def matrix_sizes(self) -> tuple[int, int]:
-        e_size = struct.unpack_from('H', self.buffer, E_SIZE)[0]
-        de_size = struct.unpack_from('H', self.buffer, DE_SIZE)[0]
+    def sections(self) -> dict[str, tuple[int, int]]:
+        '''
+        Offset and stored length in file of every area:\n
+        header, matrix, locuses, spectrums and optional pyramid.
+        '''
+        return self.__sections.copy()
 
-        return (e_size, de_size)
+    @property
+    def matrix_sizes(self) -> tuple[int, int]:
+        return (self.__header['e_size'], self.__header['de_size'])
 
     def get_experiment(self) -> PhysicalExperiment:
         beam = self.parse_beam()
         target = self.parse_target()
         energy = self.parse_beam_energy()
 
-        return PhysicalExperiment(beam, target, energy)
+        return PhysicalExperiment(beam, target, energy, self.relativistic)
 
     def parse_beam(self) -> Nuclei:
-        charge = struct.unpack_from('B', self.buffer, BEAM_CHARGE)[0]
-        nuclons = struct.unpack_from('B', self.buffer, BEAM_NUCLON)[0]
-
-        return Nuclei(charge, nuclons)
+        return Nuclei(self.__header['beam_charge'], self.__header['beam_nuclons'])
 
     def parse_target(self) -> Nuclei:
-        charge = struct.unpack_from('B', self.buffer, TARGET_CHARGE)[0]
-        nuclons = struct.unpack_from('B', self.buffer, TARGET_NUCLON)[0]
-
-        return Nuclei(charge, nuclons)
+        return Nuclei(self.__header['target_charge'], self.__header['target_nuclons'])
 
     def parse_beam_energy(self) -> float:
-        return struct.unpack_from('f', self.buffer, BEAM_ENERGY)[0]
+        return self.__header['beam_energy']
 
     def get_electronics(self) -> Telescope:
-        e_thick = struct.unpack_from('f', self.buffer, E_DETECTOR_THICKNESS)[0]
-        e_madeof = struct.unpack_from('4s', self.buffer, E_DETECTOR_MADEOF)[0].decode('ascii')
-        e_res = struct.unpack_from('f', self.buffer, E_DETECTOR_RESOLUTION)[0]
-
-        de_thick = struct.unpack_from('f', self.buffer, DE_DETECTOR_THICKNESS)[0]
-        de_madeof = struct.unpack_from('4s', self.buffer, DE_DETECTOR_MADEOF)[0].decode('ascii')
-        de_res = struct.unpack_from('f', self.buffer, DE_DETECTOR_RESOLUTION)[0]
-
-        collimator = struct.unpack_from('f', self.buffer, COLLIMATOR_RADIUS)[0]
-        distance = struct.unpack_from('f', self.buffer, TARGET_DETECTOR_DISTANCE)[0]
+        header = self.__header
 
-        stopping = Detector(e_madeof, e_thick, e_res * 1e-3)
-        piercing = Detector(de_madeof, de_thick, de_res * 1e-3)
+        stopping = Detector(
+            header['e_detector_madeof'].decode('ascii'),
+            header['e_detector_thickness'],
+            header['e_detector_resolution'] * 1e-3
+        )
+        piercing = Detector(
+            header['de_detector_madeof'].decode('ascii'),
+            header['de_detector_thickness'],
+            header['de_detector_resolution'] * 1e-3
+        )
 
-        return Telescope(stopping, piercing, collimator, distance)
+        return Telescope(stopping, piercing, header['collimator_radius'], header['target_detector_distance'])
 
     def get_angle(self) -> float:
-        return struct.unpack_from('f', self.buffer, DETECTOR_ANGLE)[0]
+        return self.__header['detector_angle']
 
     def get_integrator_counts(self) -> int:
-        return struct.unpack_from('I', self.buffer, INTEGRATOR_COUNTS)[0]
+        return self.__header['integrator_counts']
 
     def get_integrator_constant(self) -> float:
-        return struct.unpack_from('f', self.buffer, INTEGRATOR_CONSTANT)[0]
+        return self.__header['integrator_constant']
+
+    def get_coincidence(self) -> int:
+        return self.__header['coincidence']
 
     def get_misscalculation(self) -> float:
-        coincidence = struct.unpack_from('I', self.buffer, COINCIDENCE)[0]
+        coincidence = self.get_coincidence()
         matrix = self.get_matrix()
 
         return coincidence / matrix.sum()
 
     def get_matrix(self) -> numpy.ndarray:
-        e_size, de_size = self.matrix_sizes
-        flat = [struct.unpack_from('I', self.buffer, MATRIX_START + 4 * i)[0] for i in range(e_size * de_size)]
-        return numpy.array(flat).reshape(de_size, e_size)
-
-    def take_locuses(self) -> dict[Nuclei, Locus]:
-        matrix = self.get_matrix()
+        if self.__matrix is None:
+            e_size, de_size = self.matrix_sizes
+            flat = numpy.frombuffer(self.__area('matrix'), dtype=schema.MATRIX_CELL, count=e_size * de_size)
+            self.__matrix = flat.reshape(de_size, e_size)
+            self.__matrix.flags.writeable = False
+
+        return self.__matrix
+
+    def is_own_matrix(self, matrix: numpy.ndarray | SparseMatrix) -> bool:
+        '''
+        Whether matrix is the decoded one, without loading released content.
+        '''
+        return self.__matrix is not None and matrix is self.__matrix
+
+    def get_pyramid(self) -> Pyramid:
+        '''
+        Downsampled levels of matrix. Files without stored
+        pyramid get it computed once on first access.
+        '''
+        if self.__pyramid is None:
+            e_size, de_size = self.matrix_sizes
+            if 'pyramid' in self.__sections:
+                self.__pyramid = Pyramid.from_bytes(self.__area('pyramid'), (de_size, e_size))
+            else:
+                self.__pyramid = Pyramid.from_matrix(self.get_matrix())
+
+        return self.__pyramid
+
+    def take_locuses(self, matrix: numpy.ndarray | SparseMatrix = None) -> dict[Nuclei, Locus]:
+        '''
+        Locuses of file, that cut given matrix or decoded one.
+        '''
+        # Matrix is taken first, released file is parsed again on its loading.
+        matrix = self.get_matrix() if matrix is None else matrix
+        if self.__locuses is None:
+            self.__locuses = self.__parse_locuses()
+
+        return {nuclei: Locus(matrix, points) for nuclei, points in self.__locuses.items()}
+
+    def take_spectrums(self, matrix: numpy.ndarray | SparseMatrix = None) -> dict[Nuclei, Spectrum]:
+        locuses = self.take_locuses(matrix)
+        if self.__spectrums is None:
+            self.__spectrums = self.__parse_spectrums()
 
-        offset = LOCUSES_START(*self.matrix_sizes)
-        count = struct.unpack_from('H', self.buffer, offset)[0]
-        offset += 2
+        angle = self.get_angle()
+        electronics = self.get_electronics()
+        experiment = self.get_experiment()
 
         collected = dict()
-        for _ in range(count):
-            z = struct.unpack_from('B', self.buffer, offset)[0]
-            offset += 1
+        for nuclei, calib_e0, calib_k, peaks in self.__spectrums:
+            current_reaction = experiment.create_reaction(nuclei)
+            current_spectrum = Spectrum(current_reaction, angle, electronics, locuses[nuclei].to_spectrum())
 
-            a = struct.unpack_from('B', self.buffer, offset)[0]
-            offset += 1
+            current_spectrum.scale_shift = calib_e0
+            current_spectrum.scale_value = calib_k
 
-            points_count = struct.unpack_from('I', self.buffer, offset)[0]
-            offset += 4
+            for state, peak in peaks:
+                current_spectrum.add_peak(state, peak)
 
-            current_points = []
-            for _ in range(points_count):
-                e_coordinate = struct.unpack_from('H', self.buffer, offset)[0]
-                de_coordinate = struct.unpack_from('H', self.buffer, offset + 2)[0]
+            collected[nuclei] = current_spectrum
 
-                current_points.append((e_coordinate, de_coordinate))
-                offset += 4
+        return collected
 
-            collected[Nuclei(z, a)] = Locus(matrix, current_points)
+    def release(self) -> None:
+        '''
+        Drops file content and decoded matrix, keeping header and parsed areas.
+        Content is loaded and parsed again on the next access to matrix. Decoders of
+        buffers and streams keep their content, it can not be loaded again.
+        '''
+        if self.path is None:
+            return
 
-        return collected
+        if self.__locuses is None:
+            self.__locuses = self.__parse_locuses()
 
-    def take_spectrums(self) -> dict[Nuclei, Spectrum]:
-        locuses = self.take_locuses()
-        locuses_size = sum([6 + 4 * len(locuses[nuclei].points) for nuclei in locuses]) + 2
-        offset = LOCUSES_START(*self.matrix_sizes) + locuses_size
+        if self.__spectrums is None:
+            self.__spectrums = self.__parse_spectrums()
 
-        angle = self.get_angle()
-        electronics = self.get_electronics()
-        experiment = self.get_experiment()
+        self.buffer = None
+        self.__matrix = None
+        self.__pyramid = None
+        self.__areas.clear()
 
-        collected = dict()
-        while offset < len(self.buffer):
-            current_nuclei_charge = struct.unpack_from('B', self.buffer, offset)[0]
-            current_nuclei_nuclons = struct.unpack_from('B', self.buffer, offset + 1)[0]
-            current_nuclei = Nuclei(current_nuclei_charge, current_nuclei_nuclons)
-            offset += 2
+    def __load(self, source: str | bytes | memoryview | BinaryIO) -> mmap.mmap | memoryview | bytes:
+        if self.path is not None:
+            with open(self.path, 'rb') as file:
+                return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if self.is_mapped else file.read()
 
-            current_reaction = experiment.create_reaction(current_nuclei)
-            current_locus = locuses[current_nuclei]
+        if hasattr(source, 'getbuffer'):
+            return source.getbuffer()
 
-            current_spectrum = Spectrum(current_reaction, angle, electronics, current_locus.to_spectrum())
+        if hasattr(source, 'read'):
+            return source.read()
 
-            calib_e0 = struct.unpack_from('f', self.buffer, offset)[0]
-            calib_k = struct.unpack_from('f', self.buffer, offset + 4)[0]
-            offset += 8
+        return memoryview(source).cast('B')
 
-            current_spectrum.scale_shift = calib_e0
-            current_spectrum.scale_value = calib_k
+    def __index_sections(self) -> dict[str, tuple[int, int]]:
+        if self.version == 2:
+            table = container.read_table(self.buffer)
+            for name in container.REQUIRED:
+                if name not in table:
+                    raise ValueError(f'There is no {name} section in file {self.path or "buffer"}.')
+
+            self.__table = table
+            return {name: (table[name].offset, table[name].length) for name in table}
+
+        view = memoryview(self.buffer)
+        header = schema.HEADER.unpack(view)
+        locuses_start = schema.locuses_start(header['de_size'], header['e_size'])
+
+        offset = locuses_start
+        count = schema.LOCUSES.unpack(view, offset)['locuses_count']
+        offset += schema.LOCUSES.size
+
+        for _ in range(count):
+            points_count = schema.LOCUS.unpack(view, offset)['points_count']
+            offset += schema.LOCUS.size + schema.POINT.itemsize * points_count
+
+        starts = [0, schema.MATRIX_START, locuses_start, offset, len(view)]
+
+        sections = dict()
+        for i in range(len(container.REQUIRED)):
+            name = container.REQUIRED[i]
+            sections[name] = (starts[i], starts[i + 1] - starts[i])
+            self.__areas[name] = view[starts[i]: starts[i + 1]]
+
+        return sections
+
+    def __area(self, name: str) -> memoryview | bytes:
+        '''
+        Content of file area. Compressed sections of version 2
+        are unpacked on first access. Released file is loaded again
+        with its current version and header, it could be saved since.
+        '''
+        if self.buffer is None:
+            self.buffer = self.__load(self.path)
+            self.version = 2 if container.is_container(self.buffer) else 1
+            self.__sections = self.__index_sections()
+            self.__header = schema.HEADER.unpack(self.__area('header'))
+            self.__locuses = None
+            self.__spectrums = None
 
-            peaks_count = struct.unpack_from('H', self.buffer, offset)[0]
-            offset += 2
+        if name not in self.__areas:
+            self.__areas[name] = container.unpack_section(self.buffer, self.__table[name])
 
-            for _ in range(peaks_count):
-                gathered = self.__gather_peak(offset)
-                current_spectrum.add_peak(*gathered)
-                offset += 17
-            
-            collected[current_nuclei] = current_spectrum
+        return self.__areas[name]
+
+    def __parse_locuses(self) -> dict[Nuclei, list[tuple[int, int]]]:
+        area = self.__area('locuses')
+
+        offset = 0
+        count = schema.LOCUSES.unpack(area, offset)['locuses_count']
+        offset += schema.LOCUSES.size
+
+        collected = dict()
+        for _ in range(count):
+            head = schema.LOCUS.unpack(area, offset)
+            offset += schema.LOCUS.size
+
+            points = schema.read_records(area, schema.POINT, head['points_count'], offset)
+            offset += points.nbytes
+
+            collected[Nuclei(head['charge'], head['nuclons'])] = list(zip(points['e'].tolist(), points['de'].tolist()))
 
         return collected
-    
-    def __gather_peak(self, offset: int) -> tuple[float, PeakFunction]:
-        state = struct.unpack_from('f', self.buffer, offset)[0]
-        offset += 4
 
-        center = struct.unpack_from('f', self.buffer, offset)[0]
-        offset += 4
+    def __parse_spectrums(self) -> list[tuple[Nuclei, float, float, list[tuple[float, PeakFunction]]]]:
+        area = self.__area('spectrums')
+
+        offset = 0
+        collected = []
+        while offset < len(area):
+            head = schema.SPECTRUM.unpack(area, offset)
+            offset += schema.SPECTRUM.size
 
-        fwhm = struct.unpack_from('f', self.buffer, offset)[0]
-        offset += 4
+            records = schema.read_records(area, schema.PEAK, head['peaks_count'], offset)
+            offset += records.nbytes
 
-        area = struct.unpack_from('f', self.buffer, offset)[0]
-        offset += 1
+            peaks = [self.__gather_peak(record) for record in records.tolist()]
+            collected.append((Nuclei(head['charge'], head['nuclons']), head['calib_e0'], head['calib_k'], peaks))
 
-        gauss_or_lorentz = struct.unpack_from('b', self.buffer, offset)[0]
+        return collected
+    
+    def __gather_peak(self, record: tuple[float, float, float, float, int]) -> tuple[float, PeakFunction]:
+        state, center, fwhm, area, gauss_or_lorentz = record
         return (round(state, 3), Gaussian(center, fwhm, area) if gauss_or_lorentz == 0 else Lorentzian(center, fwhm, area))
     
 
@@ -7,6 +7,11 @@ class Detector:
         self.__madeof = madeof
         self.__thickness = thickness
         self.__resolution = resolution
+        self.__is_dirty = False
+
+    @property
+    def is_dirty(self) -> bool:
+        return self.__is_dirty
 
     @property
     def madeof(self) -> str:
@@ -17,6 +22,7 @@ class Detector:
         if val.lower() not in ['ge', 'si', 'c3h6']:
             return
         self.__madeof = val
+        self.__is_dirty = True
     
     @property
     def madeof_nuclei(self) -> Nuclei:
@@ -34,6 +40,7 @@ class Detector:
         if val <= 0:
             return
         self.__thickness = val
+        self.__is_dirty = True
     
     @property
     def resolution(self) -> float:
@@ -44,6 +51,7 @@ class Detector:
         if val < 0:
             return
         self.__resolution = val
+        self.__is_dirty = True
     
     @property
     def density(self) -> float:
@@ -52,6 +60,9 @@ class Detector:
             case 'si': return 2.330
             case _: return 1.000
 
+    def clean(self) -> None:
+        self.__is_dirty = False
+
     def __eq__(self, other: Detector) -> bool:
         return self.madeof_nuclei == other.madeof_nuclei and \
                self.thickness == other.thickness and \
@@ -66,6 +77,11 @@ class Telescope:
         
         self.__distance = distance
         self.__collimator_radius = kollimator_radius
+        self.__is_dirty = False
+
+    @property
+    def is_dirty(self) -> bool:
+        return self.__is_dirty or self.__e_detector.is_dirty or self.__de_detector.is_dirty
 
     @property
     def e_detector(self) -> Detector:
@@ -84,6 +100,7 @@ class Telescope:
         if val >= 0:
             return
         self.__collimator_radius = val
+        self.__is_dirty = True
     
     @property
     def distance(self) -> float:
@@ -94,6 +111,12 @@ class Telescope:
         if val <= 0:
             return
         self.__distance = val
+        self.__is_dirty = True
+
+    def clean(self) -> None:
+        self.__is_dirty = False
+        self.__e_detector.clean()
+        self.__de_detector.clean()
 
     def solid_angle(self) -> float:
         return 2 * 3.1415 * (self.collimator_radius ** 2) / (self.distance ** 2)
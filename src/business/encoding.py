@@ -1,173 +1,281 @@
 import os
-import struct
+import numpy
+from typing import BinaryIO
 
+from business import schema, container
 from business.matrix import Matrix
+from business.decoding import Decoder
 from business.peaks import Gaussian
 
 
-# Physics area
-BEAM_CHARGE              = 0
-BEAM_NUCLON              = 1
-TARGET_CHARGE            = 2
-TARGET_NUCLON            = 3
-BEAM_ENERGY              = 4
-DETECTOR_ANGLE           = 8
-# Electronics area
-E_DETECTOR_THICKNESS     = 12
-E_DETECTOR_MADEOF        = 16
-E_DETECTOR_RESOLUTION    = 20
-DE_DETECTOR_THICKNESS    = 24
-DE_DETECTOR_MADEOF       = 28
-DE_DETECTOR_RESOLUTION   = 32
-# Cross-section valuable, details area
-INTEGRATOR_COUNTS        = 36
-CONGRUENCE               = 40
-INTEGRATOR_CONSTANT      = 44
-COLLIMATOR_RADIUS        = 48
-TARGET_DETECTOR_DISTANCE = 52
-# Matrix area
-E_SIZE                   = 56
-DE_SIZE                  = 58
-MATRIX_START             = 60
-# Dynamic area, locuses and spectres
-LOCUSES_START = lambda height, width: MATRIX_START + 4 * height * width
-
-
 class Encoder:
-    def __init__(self, matrix: Matrix, directory: str) -> None:
+    def __init__(self, matrix: Matrix, directory: str = None, version: int = None, codecs: dict[str, str] = None) -> None:
+        '''
+        Encoder of dSigma file.\n
+        By default file is written in version of decoded one, so files
+        of version 1 stay readable by older builds. Conversion to version 2
+        is done only when version 2 is asked explicitly.
+        Codecs of sections are applied only for version 2. By default matrix
+        is compressed, container.MAPPED_CODECS keep it raw for mapped decoding.
+        Matrix can be encoded to buffer or stream without any file.
+        '''
         self.matrix = matrix
         self.directory = directory
+        self.version = matrix.decoder.version if version is None else version
+        self.codecs = codecs
+
+    def write_down(self, incremental: bool = True, path: str = None) -> str:
+        '''
+        Writes matrix to its file or to another path. In incremental mode, when matrix
+        area is the same as in its file, only header and area after matrix are rewritten.
+        Matrix saved to its own file gets decoder of the written file.
+        '''
+        path = self.matrix.decoder.path if path is None else path
+        if path is None:
+            raise ValueError('Matrix was not decoded from file, path must be given.')
+
+        if incremental and path == self.matrix.decoder.path and self.is_patchable():
+            return self.patch_down()
+
+        # Decoded matrix can be a view over mapped file,
+        # so the file is replaced instead of being truncated.
+        with open(path + '.tmp', 'wb') as binary:
+            self.write_into(binary)
+
+        os.replace(path + '.tmp', path)
+
+        if path == self.matrix.decoder.path:
+            self.reattach()
+
+        return path
+
+    def write_into(self, stream: BinaryIO) -> int:
+        '''
+        Writes encoded matrix to binary stream, returns count of written bytes.
+        '''
+        buffer = self.encode()
+        stream.write(buffer)
+
+        return len(buffer)
+
+    def is_patchable(self) -> bool:
+        decoder = self.matrix.decoder
+        if self.version != decoder.version or not decoder.is_own_matrix(self.matrix.numbers):
+            return False
+
+        if decoder.path is None or not os.path.isfile(decoder.path):
+            return False
 
-    def write_down(self) -> str:
+        with open(decoder.path, 'rb') as binary:
+            if self.version == 1:
+                head = binary.read(schema.MATRIX_START)
+                if len(head) < schema.MATRIX_START or container.is_container(head):
+                    return False
+
+                header = schema.HEADER.unpack(head)
+                return (header['de_size'], header['e_size']) == self.matrix.numbers.shape
+
+            table = self.read_table(binary)
+
+        if table is None or 'header' not in table or 'matrix' not in table:
+            return False
+
+        return table['header'].codec == 'none' and table['header'].length == schema.MATRIX_START
+
+    def patch_down(self) -> str:
+        '''
+        Rewrites header fields in place and replaces locuses
+        and spectrums, which follow the unchanged matrix area.
+        Sections table of version 2 is rewritten only after the
+        whole tail, so it never points past the end of file.
+        '''
         path = self.matrix.decoder.path
+        header = self.encode_header()
+        locuses, spectrums = self.encode_tail()
+
+        # Tail of mapped file is truncated, old decoder must not read it anymore.
+        self.matrix.decoder.release()
+
+        with open(path, 'r+b') as binary:
+            if self.version == 1:
+                binary.seek(0)
+                binary.write(header)
+
+                binary.seek(schema.locuses_start(*self.matrix.numbers.shape))
+                binary.write(locuses)
+                binary.write(spectrums)
+                binary.truncate()
+            else:
+                self.patch_container(binary, header, locuses, spectrums)
+
+        self.reattach()
+        return path
+
+    def patch_container(self, binary: BinaryIO, header: bytes, locuses: bytearray, spectrums: bytearray) -> None:
+        table = self.read_table(binary)
+        codecs = container.DEFAULT_CODECS | (self.codecs or dict())
+        offset = max([s.offset + s.length for s in table.values() if s.name not in ['locuses', 'spectrums']])
+
+        binary.seek(table['header'].offset)
+        binary.write(header)
+
+        binary.seek(offset)
+        for name, content in [('locuses', locuses), ('spectrums', spectrums)]:
+            stored = container.compress(bytes(content), codecs[name])
+            table[name] = container.Section(name, codecs[name], offset, len(stored), len(content))
+
+            binary.write(stored)
+            offset += len(stored)
+
+        binary.flush()
+        binary.seek(0)
+        binary.write(container.pack_table(table))
+        binary.flush()
+
+        binary.truncate(offset)
+
+    def reattach(self) -> None:
+        '''
+        Points matrix to new decoder of its file, so header, locuses
+        and spectrums of decoder are the same as in written file.
+        '''
+        decoder = self.matrix.decoder
+        self.matrix.attach(Decoder(decoder.path, decoder.is_mapped, decoder.relativistic))
+
+    def read_table(self, binary) -> dict[str, container.Section]:
+        size = binary.seek(0, os.SEEK_END)
+        binary.seek(0)
+
+        preamble = binary.read(container.PREAMBLE.size)
+        if not container.is_container(preamble):
+            return None
+
+        count = container.PREAMBLE.unpack(preamble)[2]
+        return container.read_table(preamble + binary.read(container.table_size(count) - len(preamble)), size)
+
+    def encode(self) -> bytearray:
         buffer = bytearray(self.calc_byte_size())
 
-        self.write_physics(buffer)
-        self.write_electronics(buffer)
-        self.write_details(buffer)
+        schema.HEADER.pack_into(buffer, 0, self.header_fields())
         self.write_matrix(buffer)
         self.write_locuses(buffer)
         self.write_spectrums(buffer)
 
-        with open(path, 'wb') as binary:
-            binary.write(buffer)
+        if self.version == 1:
+            return buffer
 
-        return path
+        sections = self.split_sections(buffer)
+        sections['pyramid'] = self.matrix.pyramid.to_bytes()
 
-    def write_physics(self, buffer: bytearray) -> None:
-        beam = self.matrix.experiment.beam
-        target = self.matrix.experiment.target
-        energy = self.matrix.experiment.beam_energy
-        angle = self.matrix.angle
+        return container.pack(sections, self.codecs)
 
-        struct.pack_into('B', buffer, BEAM_CHARGE, beam.charge)
-        struct.pack_into('B', buffer, BEAM_NUCLON, beam.nuclons)
+    def encode_header(self) -> bytes:
+        return schema.HEADER.pack(self.header_fields())
 
-        struct.pack_into('B', buffer, TARGET_CHARGE, target.charge)
-        struct.pack_into('B', buffer, TARGET_NUCLON, target.nuclons)
+    def encode_tail(self) -> tuple[bytearray, bytearray]:
+        locuses = bytearray(self.calc_locuses_size())
+        spectrums = bytearray(self.calc_spectrums_size())
 
-        struct.pack_into('f', buffer, BEAM_ENERGY, energy)
-        struct.pack_into('f', buffer, DETECTOR_ANGLE, angle)
+        self.write_locuses(locuses, 0)
+        self.write_spectrums(spectrums, 0)
 
-    def write_electronics(self, buffer: bytearray) -> None:
-        telescope = self.matrix.electronics
-        e_detector = telescope.e_detector
-        de_detector = telescope.de_detector
-
-        struct.pack_into('f', buffer, E_DETECTOR_THICKNESS, e_detector.thickness)
-        struct.pack_into('4s', buffer, E_DETECTOR_MADEOF, e_detector.madeof.encode('ascii'))
-        struct.pack_into('f', buffer, E_DETECTOR_RESOLUTION, e_detector.resolution * 1e3)
+        return (locuses, spectrums)
 
-        struct.pack_into('f', buffer, DE_DETECTOR_THICKNESS, de_detector.thickness)
-        struct.pack_into('4s', buffer, DE_DETECTOR_MADEOF, de_detector.madeof.encode('ascii'))
-        struct.pack_into('f', buffer, DE_DETECTOR_RESOLUTION, de_detector.resolution * 1e3)
+    def split_sections(self, buffer: bytearray) -> dict[str, memoryview]:
+        view = memoryview(buffer)
+        locuses_start = schema.locuses_start(*self.matrix.numbers.shape)
+        spectrums_start = locuses_start + self.calc_locuses_size()
 
-    def write_details(self, buffer: bytearray) -> None:
-        integrator_count = self.matrix.integrator_counts
-        integrator_constant = self.matrix.integrator_constant
-        coincidence = int(self.matrix.misscalculation * self.matrix.numbers.sum())
-        radius = self.matrix.electronics.collimator_radius
-        distance = self.matrix.electronics.distance
+        return {
+            'header': view[:schema.MATRIX_START],
+            'matrix': view[schema.MATRIX_START: locuses_start],
+            'locuses': view[locuses_start: spectrums_start],
+            'spectrums': view[spectrums_start:]
+        }
 
-        struct.pack_into('I', buffer, INTEGRATOR_COUNTS, integrator_count)
-        struct.pack_into('I', buffer, CONGRUENCE, coincidence)
-        struct.pack_into('f', buffer, INTEGRATOR_CONSTANT, integrator_constant)
+    def header_fields(self) -> dict[str, int | float | bytes]:
+        experiment = self.matrix.experiment
+        telescope = self.matrix.electronics
+        de_length, e_length = self.matrix.numbers.shape
 
-        struct.pack_into('f', buffer, COLLIMATOR_RADIUS, radius)
-        struct.pack_into('f', buffer, TARGET_DETECTOR_DISTANCE, distance)
+        return {
+            'beam_charge': experiment.beam.charge,
+            'beam_nuclons': experiment.beam.nuclons,
+            'target_charge': experiment.target.charge,
+            'target_nuclons': experiment.target.nuclons,
+            'beam_energy': experiment.beam_energy,
+            'detector_angle': self.matrix.angle,
+
+            'e_detector_thickness': telescope.e_detector.thickness,
+            'e_detector_madeof': telescope.e_detector.madeof.encode('ascii'),
+            'e_detector_resolution': telescope.e_detector.resolution * 1e3,
+            'de_detector_thickness': telescope.de_detector.thickness,
+            'de_detector_madeof': telescope.de_detector.madeof.encode('ascii'),
+            'de_detector_resolution': telescope.de_detector.resolution * 1e3,
+
+            'integrator_counts': self.matrix.integrator_counts,
+            'coincidence': int(self.matrix.misscalculation * self.matrix.numbers.sum()),
+            'integrator_constant': self.matrix.integrator_constant,
+            'collimator_radius': telescope.collimator_radius,
+            'target_detector_distance': telescope.distance,
+
+            'e_size': e_length,
+            'de_size': de_length
+        }
 
     def write_matrix(self, buffer: bytearray) -> None:
-        matrix = self.matrix.numbers
+        matrix = numpy.asarray(self.matrix.numbers)
         de_length, e_length = self.matrix.numbers.shape
 
-        struct.pack_into('H', buffer, E_SIZE, e_length)
-        struct.pack_into('H', buffer, DE_SIZE, de_length)
+        # Assignment casts numbers silently, so values out of cells range are checked.
+        if matrix.size != 0 and (matrix.min() < 0 or matrix.max() > numpy.iinfo(schema.MATRIX_CELL).max):
+            raise ValueError('Counts of matrix cells are out of 32-bits range.')
+
+        cells = numpy.frombuffer(buffer, dtype=schema.MATRIX_CELL, count=de_length * e_length, offset=schema.MATRIX_START)
+        cells.reshape(de_length, e_length)[:] = matrix
 
-        for i in range(de_length):
-            for j in range(e_length):
-                offset = 4 * (i * de_length + j)
-                struct.pack_into('I', buffer, MATRIX_START + offset, matrix[i, j])
+    def write_locuses(self, buffer: bytearray, offset: int = None) -> None:
+        if offset is None:
+            offset = schema.locuses_start(*self.matrix.numbers.shape)
 
-    def write_locuses(self, buffer: bytearray) -> None:
-        offset = LOCUSES_START(*self.matrix.numbers.shape)
         locuses = self.matrix.locuses
 
-        struct.pack_into('H', buffer, offset, len(locuses))
-        offset += 2
+        schema.LOCUSES.pack_into(buffer, offset, {'locuses_count': len(locuses)})
+        offset += schema.LOCUSES.size
 
         for nuclei in locuses:
-            struct.pack_into('B', buffer, offset, nuclei.charge)
-            offset += 1
-
-            struct.pack_into('B', buffer, offset, nuclei.nuclons)
-            offset += 1
+            points = numpy.array([tuple(point) for point in locuses[nuclei].points], dtype=schema.POINT)
 
-            struct.pack_into('I', buffer, offset, len(locuses[nuclei].points))
-            offset += 4
+            schema.LOCUS.pack_into(buffer, offset, {'charge': nuclei.charge, 'nuclons': nuclei.nuclons, 'points_count': len(points)})
+            offset += schema.LOCUS.size
 
-            for point in locuses[nuclei].points:
-                struct.pack_into('H', buffer, offset, point[0])
-                struct.pack_into('H', buffer, offset + 2, point[1])
-                offset += 4
+            buffer[offset: offset + points.nbytes] = points.tobytes()
+            offset += points.nbytes
 
-    def write_spectrums(self, buffer: bytearray) -> None:
-        spectrums_area_size = sum([12 + 16 * len(self.matrix.spectrums[n].peaks) for n in self.matrix.spectrums])
-        offset = self.calc_byte_size() - spectrums_area_size
+    def write_spectrums(self, buffer: bytearray, offset: int = None) -> None:
+        if offset is None:
+            offset = self.calc_byte_size() - self.calc_spectrums_size()
 
         spectres = self.matrix.spectrums
 
         for nuclei in spectres:
-            fragment = spectres[nuclei].reaction.fragment
-            struct.pack_into('B', buffer, offset, fragment.charge)
-            offset += 1
-
-            struct.pack_into('B', buffer, offset, fragment.nuclons)
-            offset += 1
-
-            struct.pack_into('f', buffer, offset, spectres[nuclei].scale_shift)
-            offset += 4
-
-            struct.pack_into('f', buffer, offset, spectres[nuclei].scale_value)
-            offset += 4
-
-            peaks_count = len(spectres[nuclei].peaks)
-            struct.pack_into('H', buffer, offset, peaks_count)
-            offset += 2
-
-            for state in spectres[nuclei].peaks:
-                struct.pack_into('f', buffer, offset, state)
-                offset += 4
-
-                struct.pack_into('f', buffer, offset, spectres[nuclei].peaks[state].mu)
-                offset += 4
+            spectrum = spectres[nuclei]
+            fragment = spectrum.reaction.fragment
 
-                struct.pack_into('f', buffer, offset, spectres[nuclei].peaks[state].fwhm)
-                offset += 4
+            peaks = numpy.array([
+                (state, peak.mu, peak.fwhm, peak.area, 0 if isinstance(peak, Gaussian) else 1)
+                for state, peak in spectrum.peaks.items()
+            ], dtype=schema.PEAK)
 
-                struct.pack_into('f', buffer, offset, spectres[nuclei].peaks[state].area)
-                offset += 1
+            schema.SPECTRUM.pack_into(buffer, offset, {
+                'charge': fragment.charge, 'nuclons': fragment.nuclons,
+                'calib_e0': spectrum.scale_shift, 'calib_k': spectrum.scale_value,
+                'peaks_count': len(peaks)
+            })
+            offset += schema.SPECTRUM.size
 
-                struct.pack_into('b', buffer, offset, 0 if isinstance(spectres[nuclei].peaks[state], Gaussian) else 1)
+            buffer[offset: offset + peaks.nbytes] = peaks.tobytes()
+            offset += peaks.nbytes
 
     def generate_file_name(self) -> str:
         beam = self.matrix.experiment.beam
@@ -178,17 +286,13 @@ class Encoder:
         return f'/{target}+{beam}_{round(energy)}MeV_{round(angle, 2)}'
     
     def calc_byte_size(self) -> int:
-        physical_area_size = 12
-        electronics_area_size = 24
-        details_area_size = 20
-        matrix_area_size = 4 + 4 * len(self.matrix.numbers.flat)
+        return schema.locuses_start(*self.matrix.numbers.shape) + self.calc_locuses_size() + self.calc_spectrums_size()
 
-        locuses_area_size = sum([6 + 4 * len(self.matrix.locuses[n].points) for n in self.matrix.locuses]) + 2
-        spectrums_area_size = sum([12 + 17 * len(self.matrix.spectrums[n].peaks) for n in self.matrix.spectrums])
+    def calc_locuses_size(self) -> int:
+        return schema.locuses_size([len(self.matrix.locuses[n].points) for n in self.matrix.locuses])
 
-        return physical_area_size + electronics_area_size + \
-                details_area_size + matrix_area_size + \
-                locuses_area_size + spectrums_area_size
+    def calc_spectrums_size(self) -> int:
+        return schema.spectrums_size([len(self.matrix.spectrums[n].peaks) for n in self.matrix.spectrums])
 
 
 if __name__ == '__main__':
@@ -1,5 +1,6 @@
 from __future__ import annotations
 import os
+import functools
 
 
 NAME2CHARGE = {
@@ -59,60 +60,110 @@ PARITY_SIZE = 10
 GAMMA_SIZE = 10
 
 
-def mass_excess_of(z: int, a: int) -> float:
-    with open(find_file(z), 'r') as file:
-        buffer = file.read().split('\n')
+ENSDF_PATH = './ensdf/'
+ELEMENTS_CACHE = 16
+ISOTOPES_CACHE = 512
 
-    start, _ = find_nuclei_area(z, a, buffer)
-    return get_mass_excess(buffer[start])
 
-def excitation_energies(z: int, a: int) -> list[float]:
-    with open(find_file(z), 'r') as file:
-        buffer = file.read().split('\n')
+class IsotopeRecord:
+    '''
+    Lines of isotope in element file of ensdf.\n
+    Every field is parsed once on its first access.
+    '''
+    def __init__(self, head: str, levels: tuple[str, ...]) -> None:
+        self.head = head
+        self.levels = levels
 
-    start, stop = find_nuclei_area(z, a, buffer)
+        self.__mass_excess: float = None
+        self.__energies: tuple[float, ...] = None
+        self.__spins: tuple[tuple[float, bool], ...] = None
+        self.__gammas: tuple[float, ...] = None
 
-    collected = []
-    for i in range(start + 1, stop):
-        collected.append(get_energy(buffer[i]))
+    @property
+    def mass_excess(self) -> float:
+        if self.__mass_excess is None:
+            self.__mass_excess = get_mass_excess(self.head)
 
-    return collected
+        return self.__mass_excess
 
-def spin_parity(z: int, a: int) -> list[tuple[float, bool]]:
-    with open(find_file(z), 'r') as file:
-        buffer = file.read().split('\n')
+    @property
+    def energies(self) -> tuple[float, ...]:
+        if self.__energies is None:
+            self.__energies = tuple([get_energy(line) for line in self.levels])
+
+        return self.__energies
 
-    start, stop = find_nuclei_area(z, a, buffer)
+    @property
+    def spins(self) -> tuple[tuple[float, bool], ...]:
+        if self.__spins is None:
+            self.__spins = tuple([get_spin_parity(line) for line in self.levels])
 
-    collected = []
-    for i in range(start + 1, stop):
-        collected.append(get_spin_parity(buffer[i]))
+        return self.__spins
 
-    return collected
+    @property
+    def gammas(self) -> tuple[float, ...]:
+        if self.__gammas is None:
+            self.__gammas = tuple([get_gamma(line) for line in self.levels])
+
+        return self.__gammas
+
+
+def mass_excess_of(z: int, a: int) -> float:
+    return isotope_record(z, a).mass_excess
+
+def excitation_energies(z: int, a: int) -> list[float]:
+    return list(isotope_record(z, a).energies)
+
+def spin_parity(z: int, a: int) -> list[tuple[float, bool]]:
+    return list(isotope_record(z, a).spins)
 
 def gammas(z: int, a: int) -> list[float]:
-    with open(find_file(z), 'r') as file:
-        buffer = file.read().split('\n')
-    start, stop = find_nuclei_area(z, a, buffer)
+    return list(isotope_record(z, a).gammas)
 
-    collected = []
-    for i in range(start + 1, stop):
-        collected.append(get_gamma(buffer[i]))
+def isotope_record(z: int, a: int) -> IsotopeRecord:
+    record = find_record(z, a)
+    if record is None:
+        raise ValueError(f'Cannot find nuclei with z: {z} and a: {a}')
 
-    return collected
+    return record
 
+@functools.lru_cache(maxsize=ISOTOPES_CACHE)
+def find_record(z: int, a: int) -> IsotopeRecord | None:
+    '''
+    Record of isotope or None, when element file has not it.
+    Missing isotopes are cached too, they are looked up often
+    while checking possible reaction channels.
+    '''
+    buffer = element_lines(z)
 
-def find_file(z: int) -> str:
-    ensdf_path = './ensdf/'
-    files = os.listdir(ensdf_path)
+    try:
+        start, stop = find_nuclei_area(z, a, buffer)
+    except ValueError:
+        return None
+
+    return IsotopeRecord(buffer[start], buffer[start + 1: stop])
 
+@functools.lru_cache(maxsize=ELEMENTS_CACHE)
+def element_lines(z: int) -> tuple[str, ...]:
+    with open(find_file(z), 'r') as file:
+        return tuple(file.read().split('\n'))
+
+def clear_cache() -> None:
+    '''
+    Forgets all read element files, for example after ensdf was updated.
+    '''
+    find_record.cache_clear()
+    element_lines.cache_clear()
+
+
+def find_file(z: int) -> str:
     choosen = CHARGE2NAME[z]
     looking_file = f'{z}{choosen}.txt'
 
-    if looking_file not in files:
+    if not os.path.isfile(ENSDF_PATH + looking_file):
         raise ValueError(f'Can not find the ensdf file for {choosen} nuclei')
     
-    return ensdf_path + looking_file
+    return ENSDF_PATH + looking_file
 
 def find_nuclei_area(z: int, a: int, buffer: list[str]) -> tuple[int, int]:
     choosen = CHARGE2NAME[z].upper()
@@ -133,6 +184,8 @@ def find_nuclei_area(z: int, a: int, buffer: list[str]) -> tuple[int, int]:
     if not is_opened:
         raise ValueError(f'Cannot find nuclei with z: {z} and a: {a}')
 
+    return (start, len(buffer))
+
 def get_mass_excess(line: str) -> float:
     mass_excess_flag = 'deltaM='
     if mass_excess_flag not in line:
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import os
+import re
+import struct
+import zlib
+import functools
+import threading
+import numpy
+
+from business.ensdf import ENSDF_PATH, CHARGE2NAME, INDENT, NUCLEI_SIZE
+from business.ensdf import get_mass_excess, get_energy
+
+
+INDEX_NAME    = 'ensdf.index'
+INDEX_MAGIC   = b'DSEI'
+INDEX_VERSION = 1
+INDEX_HEAD    = struct.Struct('<4sHHQQQ')  # magic, version, reserved, fingerprint, isotopes count, levels count
+INDEX_ALIGN   = 8
+INDEX_LOCK    = threading.Lock()
+
+SOURCE_NAME = re.compile(r'^(\d+)([A-Za-z]+)\.txt$')
+
+# Arrays of index in order of file, isotopes are sorted by key = 1000 * Z + A.
+ISOTOPE_ARRAYS = [('keys', '<u4'), ('mass_excess', '<f8'), ('is_complete', 'u1')]
+OFFSETS_DTYPE  = numpy.dtype('<i8')
+LEVELS_DTYPE   = numpy.dtype('<f8')
+
+
+def isotope_key(z: int, a: int) -> int:
+    return 1000 * z + a
+
+def sources(directory: str) -> list[tuple[int, str]]:
+    '''
+    Element files of ensdf directory as (Z, path) pairs.
+    '''
+    if not os.path.isdir(directory):
+        return []
+
+    collected = []
+    for entry in os.scandir(directory):
+        matched = SOURCE_NAME.match(entry.name)
+        if matched is None or not entry.is_file():
+            continue
+
+        z = int(matched.group(1))
+        if CHARGE2NAME.get(z) == matched.group(2):
+            collected.append((z, entry.path))
+
+    return sorted(collected)
+
+def fingerprint(files: list[tuple[int, str]]) -> int:
+    '''
+    Checksum of names, sizes and modification times of source files.
+    '''
+    described = []
+    for _, path in files:
+        stat = os.stat(path)
+        described.append(f'{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}')
+
+    return zlib.crc32('\n'.join(described).encode('utf-8'))
+
+def parse_element(z: int, path: str) -> list[tuple[int, float, list[float], bool]]:
+    '''
+    Isotopes of element file as (A, mass excess, level energies, is complete).
+    Isotope is a run of lines with the same nuclide field, first of them is
+    head line with mass excess. Isotopes, which head can not be parsed, are skipped.
+    '''
+    with open(path, 'r') as file:
+        lines = file.read().split('\n')
+
+    name = CHARGE2NAME[z].upper()
+
+    runs: list[tuple[str, list[str]]] = []
+    for line in lines:
+        nuclide = line[INDENT: INDENT + NUCLEI_SIZE].strip()
+        if len(nuclide) == 0:
+            continue
+
+        if len(runs) != 0 and runs[-1][0] == nuclide:
+            runs[-1][1].append(line)
+        else:
+            runs.append((nuclide, [line]))
+
+    collected = []
+    for nuclide, run in runs:
+        if not nuclide.endswith(name) or not nuclide[:-len(name)].isdigit():
+            continue
+
+        try:
+            mass_excess = get_mass_excess(run[0])
+        except ValueError:
+            continue
+
+        try:
+            energies, is_complete = [get_energy(line) for line in run[1:]], True
+        except ValueError:
+            energies, is_complete = [], False
+
+        collected.append((int(nuclide[:-len(name)]), mass_excess, energies, is_complete))
+
+    return collected
+
+
+class EnsdfIndex:
+    '''
+    Binary index of ensdf directory with keys, mass excesses
+    and level energies of all isotopes in flat numpy arrays.\n
+    Index is memory-mapped from file next to sources and is rebuilt,
+    when names, sizes or modification times of sources are changed.
+    Spins and widths are still read from text files.
+    '''
+    def __init__(self, directory: str = ENSDF_PATH) -> None:
+        self.directory = directory
+        self.path = os.path.join(directory, INDEX_NAME)
+
+        files = sources(directory)
+        self.fingerprint = fingerprint(files)
+
+        arrays = self.__read()
+        if arrays is None:
+            arrays = self.build(files)
+            self.__write(arrays)
+
+        self.keys, self.mass_excesses, self.is_complete, self.offsets, self.levels = arrays
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __repr__(self) -> str:
+        return f'EnsdfIndex({self.directory}, isotopes: {len(self.keys)}, levels: {len(self.levels)})'
+
+    def find(self, z: int, a: int) -> int:
+        '''
+        Position of isotope in index or -1, when there is no such isotope.
+        '''
+        key = isotope_key(z, a)
+        position = int(numpy.searchsorted(self.keys, key))
+
+        if position < len(self.keys) and self.keys[position] == key:
+            return position
+
+        return -1
+
+    def is_exist(self, z: int, a: int) -> bool:
+        return self.find(z, a) >= 0
+
+    def mass_excess(self, z: int, a: int) -> float:
+        return float(self.mass_excesses[self.__position(z, a)])
+
+    def states(self, z: int, a: int) -> numpy.ndarray:
+        '''
+        Level energies of isotope as view over index.
+        '''
+        position = self.__position(z, a)
+        if not self.is_complete[position]:
+            raise ValueError(f'Levels of nuclei with z: {z} and a: {a} can not be parsed.')
+
+        return self.levels[self.offsets[position]: self.offsets[position + 1]]
+
+    def build(self, files: list[tuple[int, str]]) -> tuple[numpy.ndarray, ...]:
+        isotopes = []
+        for z, path in files:
+            for a, mass_excess, energies, is_complete in parse_element(z, path):
+                isotopes.append((isotope_key(z, a), mass_excess, energies, is_complete))
+
+        # The first run of lines is taken, same as text lookup does.
+        unique = dict()
+        for isotope in isotopes:
+            unique.setdefault(isotope[0], isotope)
+        isotopes = [unique[key] for key in sorted(unique)]
+
+        keys = numpy.array([i[0] for i in isotopes], dtype=ISOTOPE_ARRAYS[0][1])
+        mass_excesses = numpy.array([i[1] for i in isotopes], dtype=ISOTOPE_ARRAYS[1][1])
+        is_complete = numpy.array([i[3] for i in isotopes], dtype=ISOTOPE_ARRAYS[2][1])
+
+        offsets = numpy.zeros(len(isotopes) + 1, dtype=OFFSETS_DTYPE)
+        numpy.cumsum([len(i[2]) for i in isotopes], out=offsets[1:])
+
+        levels = numpy.array([energy for i in isotopes for energy in i[2]], dtype=LEVELS_DTYPE)
+
+        return (keys, mass_excesses, is_complete, offsets, levels)
+
+    def __position(self, z: int, a: int) -> int:
+        position = self.find(z, a)
+        if position < 0:
+            raise ValueError(f'Cannot find nuclei with z: {z} and a: {a}')
+
+        return position
+
+    def __layout(self, isotopes: int, levels: int) -> list[tuple[numpy.dtype, int, int]]:
+        '''
+        Dtype, offset and length of every array in index file.
+        '''
+        dtypes = [numpy.dtype(form) for _, form in ISOTOPE_ARRAYS] + [OFFSETS_DTYPE, LEVELS_DTYPE]
+        counts = [isotopes] * len(ISOTOPE_ARRAYS) + [isotopes + 1, levels]
+
+        layout = []
+        offset = INDEX_HEAD.size
+        for dtype, count in zip(dtypes, counts):
+            offset = -(-offset // INDEX_ALIGN) * INDEX_ALIGN
+            layout.append((dtype, offset, count))
+            offset += dtype.itemsize * count
+
+        return layout
+
+    def __read(self) -> tuple[numpy.ndarray, ...] | None:
+        if not os.path.isfile(self.path) or os.path.getsize(self.path) < INDEX_HEAD.size:
+            return None
+
+        try:
+            raw = numpy.memmap(self.path, dtype=numpy.uint8, mode='r')
+        except (OSError, ValueError):
+            return None
+
+        magic, version, _, checksum, isotopes, levels = INDEX_HEAD.unpack_from(raw, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION or checksum != self.fingerprint:
+            return None
+
+        layout = self.__layout(isotopes, levels)
+        dtype, offset, count = layout[-1]
+        if offset + dtype.itemsize * count > len(raw):
+            return None
+
+        return tuple([raw[offset: offset + dtype.itemsize * count].view(dtype) for dtype, offset, count in layout])
+
+    def __write(self, arrays: tuple[numpy.ndarray, ...]) -> None:
+        '''
+        Writes index next to sources. Index, that can not be
+        written, is kept only in memory of current process.
+        '''
+        isotopes, levels = len(arrays[0]), len(arrays[-1])
+
+        buffer = bytearray(INDEX_HEAD.pack(INDEX_MAGIC, INDEX_VERSION, 0, self.fingerprint, isotopes, levels))
+        for array, (dtype, offset, _) in zip(arrays, self.__layout(isotopes, levels)):
+            buffer += bytes(offset - len(buffer))
+            buffer += array.astype(dtype, copy=False).tobytes()
+
+        try:
+            with open(self.path + '.tmp', 'wb') as file:
+                file.write(buffer)
+
+            os.replace(self.path + '.tmp', self.path)
+        except OSError:
+            pass
+
+
+def default_index(directory: str = ENSDF_PATH) -> EnsdfIndex:
+    '''
+    Index of ensdf directory, which is loaded once per process.
+    Loading is guarded by lock, so threads of campaign loader,
+    that ask for index at once, do not build and write it twice.
+    '''
+    with INDEX_LOCK:
+        return loaded_index(directory)
+
+@functools.lru_cache(maxsize=1)
+def loaded_index(directory: str) -> EnsdfIndex:
+    return EnsdfIndex(directory)
+
+
+if __name__ == '__main__':
+    pass
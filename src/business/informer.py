@@ -1,5 +1,6 @@
 from business.ensdf import NAME2CHARGE, CHARGE2NAME
-from business.ensdf import mass_excess_of, excitation_energies, spin_parity, gammas
+from business.ensdf import spin_parity, gammas
+from business.ensdfindex import default_index
 
 
 class Informator:
@@ -13,11 +14,7 @@ class Informator:
         if z > a:
             return False
 
-        try:
-            delta_m = mass_excess_of(z, a)
-            return True
-        except:
-            return False
+        return default_index().is_exist(z, a)
 
     @staticmethod
     def all_information(z: int, a: int) -> list:
@@ -37,7 +34,7 @@ class Informator:
         if z == 0 and a == 1:
             return 'n'
         
-        if z == 1:
+        if z == 1 and a <= 3:
             isotopes = ['p', 'd', 't']
             return isotopes[a - 1]
 
@@ -45,11 +42,11 @@ class Informator:
 
     @staticmethod
     def mass_excess(z: int, a: int) -> float:
-        return mass_excess_of(z, a)
+        return default_index().mass_excess(z, a)
 
     @staticmethod
     def states(z: int, a: int) -> list[float]:
-        return excitation_energies(z, a)
+        return default_index().states(z, a).tolist()
     
     @staticmethod
     def spins(z: int, a: int) -> list[tuple[float, bool]]:
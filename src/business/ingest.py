@@ -0,0 +1,152 @@
+import os
+import numpy
+from typing import Callable
+
+from business.matrix import Matrix
+from business.encoding import Encoder
+
+
+# One event of list-mode file: E and dE channels of coincidence.
+EVENT = numpy.dtype([('e', '<u2'), ('de', '<u2')])
+CHUNK_EVENTS = 1 << 20
+
+
+class EventHistogram:
+    '''
+    Streaming histogrammer of list-mode (E, dE) events.\n
+    Events are read by chunks of fixed size and accumulated in full ADC
+    resolution, so memory does not depend on count of events and
+    matrix can be re-binned to coarser one without re-reading files.
+    '''
+    def __init__(self, e_size: int, de_size: int, event: numpy.dtype = EVENT, chunk: int = CHUNK_EVENTS) -> None:
+        self.e_size = e_size
+        self.de_size = de_size
+        self.event = event
+        self.chunk = chunk
+
+        self.__counts = numpy.zeros(de_size * e_size, dtype=numpy.uint64)
+        self.__events = 0
+        self.__dropped = 0
+
+    @property
+    def events(self) -> int:
+        '''
+        Count of all fed events, including dropped ones.
+        '''
+        return self.__events
+
+    @property
+    def dropped(self) -> int:
+        '''
+        Count of events, which channels are out of ADC range.
+        '''
+        return self.__dropped
+
+    @property
+    def numbers(self) -> numpy.ndarray:
+        return self.__counts.reshape(self.de_size, self.e_size)
+
+    def clear(self) -> None:
+        self.__counts[:] = 0
+        self.__events = 0
+        self.__dropped = 0
+
+    def feed(self, events: numpy.ndarray) -> None:
+        e = events['e'].astype(numpy.int64)
+        de = events['de'].astype(numpy.int64)
+
+        inside = (e >= 0) & (e < self.e_size) & (de >= 0) & (de < self.de_size)
+        cells = de[inside] * self.e_size + e[inside]
+
+        self.__events += len(events)
+        self.__dropped += len(events) - len(cells)
+
+        # Dense bincount allocates whole histogram,
+        # it pays off only for chunks comparable with it.
+        if len(cells) * 4 >= len(self.__counts):
+            self.__counts += numpy.bincount(cells, minlength=len(self.__counts)).astype(numpy.uint64)
+        else:
+            numpy.add.at(self.__counts, cells, 1)
+
+    def read(self, path: str, progress: Callable[[int, int], None] = None) -> None:
+        '''
+        Accumulates all events of list-mode file.
+        Progress is reported with (read bytes, file size) arguments.
+        '''
+        size = os.path.getsize(path)
+        if size % self.event.itemsize != 0:
+            raise ValueError(f'File {path} is not a list of {self.event.itemsize}-bytes events.')
+
+        with open(path, 'rb') as binary:
+            while True:
+                events = numpy.fromfile(binary, dtype=self.event, count=self.chunk)
+                if len(events) == 0:
+                    break
+
+                self.feed(events)
+                if progress is not None:
+                    progress(binary.tell(), size)
+
+    def rebin(self, e_size: int = None, de_size: int = None) -> numpy.ndarray:
+        '''
+        Matrix with given sizes made by summing up blocks of ADC channels.
+        '''
+        e_size = self.e_size if e_size is None else e_size
+        de_size = self.de_size if de_size is None else de_size
+
+        if self.e_size % e_size != 0 or self.de_size % de_size != 0:
+            raise ValueError(f'Can not re-bin {self.de_size}x{self.e_size} matrix to {de_size}x{e_size}.')
+
+        blocks = self.numbers.reshape(de_size, self.de_size // de_size, e_size, self.e_size // e_size)
+        summed = blocks.sum(axis=(1, 3))
+
+        if summed.max(initial=0) > numpy.iinfo(numpy.uint32).max:
+            raise ValueError('Counts of matrix cells are out of 32-bits range.')
+
+        return summed.astype(numpy.uint32)
+
+    def to_matrix(self, template: Matrix, e_size: int = None, de_size: int = None) -> Matrix:
+        '''
+        Matrix with histogrammed numbers and experiment conditions of template.
+        Locuses of template are kept only when sizes of matrixes are the same.
+        '''
+        matrix = Matrix(template.decoder)
+        matrix.numbers = self.rebin(e_size, de_size)
+        matrix.angle = template.angle
+        matrix.integrator_counts = template.integrator_counts
+        matrix.integrator_constant = template.integrator_constant
+
+        accepted = self.__events - self.__dropped
+        matrix.misscalculation = self.__events / accepted if accepted > 0 else 1.0
+
+        matrix.spectrums.clear()
+        locuses = matrix.locuses.copy()
+        matrix.locuses.clear()
+
+        if matrix.numbers.shape == template.numbers.shape:
+            for nuclei in locuses:
+                matrix.add_locus(nuclei, locuses[nuclei].points)
+
+        return matrix
+
+    def write_down(self, template: Matrix, directory: str, e_size: int = None, de_size: int = None) -> str:
+        '''
+        Writes histogrammed matrix as new dSigma file in directory.
+        Existing files are never replaced, name of file with the same
+        reaction, energy and angle gets a numeric suffix.
+        '''
+        encoder = Encoder(self.to_matrix(template, e_size, de_size), directory)
+
+        name = encoder.generate_file_name().lstrip('/')
+        path = os.path.join(directory, name + '.ds')
+
+        copy = 1
+        while os.path.exists(path):
+            path = os.path.join(directory, f'{name}_{copy}.ds')
+            copy += 1
+
+        return encoder.write_down(incremental=False, path=path)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,48 @@
+import numpy
+
+
+class LevelScheme:
+    '''
+    Excitation energies of nuclei sorted in ascending order.\n
+    Queries of energy windows are answered by binary search.
+    '''
+    def __init__(self, energies: list[float]) -> None:
+        self.energies = numpy.sort(numpy.asarray(energies, dtype=numpy.float64))
+        self.energies.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.energies)
+
+    def __iter__(self):
+        return iter(self.energies.tolist())
+
+    def __repr__(self) -> str:
+        return f'LevelScheme(levels: {len(self.energies)})'
+
+    def below(self, energy: float) -> numpy.ndarray:
+        '''
+        Levels with excitation energy not greater than given one.
+        '''
+        return self.energies[:numpy.searchsorted(self.energies, energy, side='right')]
+
+    def between(self, lower: float, upper: float) -> numpy.ndarray:
+        '''
+        Levels in [lower, upper] window.
+        '''
+        start = numpy.searchsorted(self.energies, lower, side='left')
+        stop = numpy.searchsorted(self.energies, upper, side='right')
+
+        return self.energies[start: stop]
+
+    def nearest(self, energy: float) -> float:
+        if len(self.energies) == 0:
+            raise ValueError('Level scheme is empty.')
+
+        position = int(numpy.searchsorted(self.energies, energy))
+        candidates = self.energies[max(position - 1, 0): position + 1]
+
+        return float(candidates[numpy.argmin(numpy.abs(candidates - energy))])
+
+
+if __name__ == '__main__':
+    pass
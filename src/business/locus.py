@@ -1,5 +1,10 @@
 import numpy as np
 
+from business.sparse import SparseMatrix
+
+
+PROJECTION_BLOCK_COLUMNS = 256
+
 
 class Cell:
     '''
@@ -37,32 +42,85 @@ class Extrapolation:
         if len(self.points) == 0:
             return np.zeros(256).tolist()
 
-        taken = self.select()
-        result = []
+        # Sorted cells are taken by pairs, which bound dE-range of one column.
+        e_positions, de_positions = self.cover()
+        columns = e_positions[0::2]
+        starts = np.minimum(de_positions[0::2], de_positions[1::2])
+        stops = np.maximum(de_positions[0::2], de_positions[1::2]) + 1
 
-        for i in range(0, len(taken), 2):
-            e_position = taken[i].e_position
+        result = self.column_sums(columns, starts, stops)
 
-            de_start = min(taken[i].de_position, taken[i + 1].de_position)
-            de_stop = max(taken[i].de_position, taken[i + 1].de_position)
+        left_bound = e_positions[0]
+        right_bound = e_positions[-1]
 
-            result.append(self.matrix[de_start:de_stop + 1, e_position].sum())
+        return np.zeros(left_bound).tolist() + result.tolist() + np.zeros(len(self.matrix) - right_bound - 1).tolist()
+
+    def column_sums(self, columns: np.ndarray, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+        '''
+        Sums of matrix[start:stop, column] for all columns. Dense matrix
+        is summed up by blocks of columns under mask of dE-ranges.
+        '''
+        if isinstance(self.matrix, SparseMatrix):
+            return self.matrix.column_sums(columns, starts, stops)
 
-        left_bound = taken[0].e_position
-        right_bound = taken[-1].e_position
+        matrix = np.asarray(self.matrix)
+        starts = np.clip(starts, 0, len(matrix))
+        stops = np.clip(stops, starts, len(matrix))
 
-        return np.zeros(left_bound).tolist() + result + np.zeros(len(self.matrix) - right_bound - 1).tolist()
+        sums = np.zeros(len(columns), dtype=np.int64)
+        for block in range(0, len(columns), PROJECTION_BLOCK_COLUMNS):
+            part = slice(block, block + PROJECTION_BLOCK_COLUMNS)
+
+            bottom, top = starts[part].min(), stops[part].max()
+            left = columns[part][0]
+
+            # Columns of locus are usually neighbours, then they are a view of matrix.
+            if np.array_equal(columns[part], np.arange(left, left + len(columns[part]))):
+                taken = matrix[bottom: top, left: left + len(columns[part])]
+            else:
+                taken = matrix[bottom: top][:, columns[part]]
+
+            rows = np.arange(bottom, top)[:, None]
+            inside = (rows >= starts[part]) & (rows < stops[part])
+            sums[part] = taken.sum(axis=0, where=inside, dtype=np.int64)
+
+        return sums
+
+    def cover(self) -> tuple[np.ndarray, np.ndarray]:
+        '''
+        E and dE positions of cells covered by all locus,
+        sorted by E and then by dE positions.
+        '''
+        e_parts, de_parts = [], []
+        for i in range(len(self.points) - 1):
+            first, second = self.points[i], self.points[i + 1]
+
+            if first.e_position == second.e_position:
+                e_parts.append(np.array([first.e_position, second.e_position]))
+                de_parts.append(np.array([first.de_position, second.de_position]))
+                continue
+
+            system = np.array([[first.e_position, 1], [second.e_position, 1]])
+            righthand = np.array([first.de_position, second.de_position])
+            line = np.linalg.solve(system, righthand)
+
+            # Rounding of numpy is half to even as builtin round.
+            x = np.arange(min(first.e_position, second.e_position), max(first.e_position, second.e_position))
+            e_parts.append(x)
+            de_parts.append(np.round(line[0] * x + line[1]).astype(np.int64))
+
+        e_positions = np.concatenate(e_parts).astype(np.int64)
+        de_positions = np.concatenate(de_parts).astype(np.int64)
+
+        order = np.argsort(e_positions * len(self.matrix) + de_positions, kind='stable')
+        return (e_positions[order], de_positions[order])
 
     def select(self) -> list[Cell]:
         '''
         Taking points for each column of matrix through all locus.\n
         Returns the result as list of Cells.
         '''
-        collected = []
-        for i in range(len(self.points) - 1):
-            collected.extend(self.step(self.points[i], self.points[i + 1]))
-
-        return sorted(collected, key=lambda x: x.e_position * len(self.matrix) + x.de_position)
+        return [Cell(e, de) for e, de in zip(*[positions.tolist() for positions in self.cover()])]
 
     def step(self, first: Cell, second: Cell) -> list[Cell]:
         '''
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import functools
+import numpy
+
+from business.ensdfindex import EnsdfIndex, default_index
+
+
+PROTON_MASS  = 938.27  # MeV
+NEUTRON_MASS = 939.57  # MeV
+
+
+class MassTable:
+    '''
+    Dense table of mass excesses indexed by [Z, N].\n
+    Cells of isotopes, that are absent in ensdf, are NaN,
+    so channels with them are closed in array operations.
+    '''
+    def __init__(self, index: EnsdfIndex) -> None:
+        keys = numpy.asarray(index.keys, dtype=numpy.int64)
+        charges, nuclons = keys // 1000, keys % 1000
+        neutrons = nuclons - charges
+
+        shape = (int(charges.max(initial=0)) + 1, int(neutrons.max(initial=0)) + 1)
+        self.table = numpy.full(shape, numpy.nan)
+        self.table[charges, neutrons] = index.mass_excesses
+
+    def __repr__(self) -> str:
+        return f'MassTable(Z: 0..{self.table.shape[0] - 1}, N: 0..{self.table.shape[1] - 1})'
+
+    def block(self, z_max: int, n_max: int) -> numpy.ndarray:
+        '''
+        Mass excesses of all isotopes with Z <= z_max and N <= n_max.
+        '''
+        block = numpy.full((z_max + 1, n_max + 1), numpy.nan)
+        z_size, n_size = min(z_max + 1, self.table.shape[0]), min(n_max + 1, self.table.shape[1])
+        block[:z_size, :n_size] = self.table[:z_size, :n_size]
+
+        return block
+
+    def mass_excess(self, z: numpy.ndarray, n: numpy.ndarray) -> numpy.ndarray:
+        z, n = numpy.asarray(z), numpy.asarray(n)
+        inside = (z >= 0) & (n >= 0) & (z < self.table.shape[0]) & (n < self.table.shape[1])
+
+        return numpy.where(inside, self.table[numpy.where(inside, z, 0), numpy.where(inside, n, 0)], numpy.nan)
+
+    def quits(self, beam: tuple[int, int], target: tuple[int, int]) -> numpy.ndarray:
+        '''
+        Ground-state Q-values of all channels of beam + target reaction
+        indexed by [Z, N] of fragment. Residual of fragment [z, n] is
+        [Zc - z, Nc - n] of compound, so residuals are the flipped block.
+        '''
+        z_compound = beam[0] + target[0]
+        n_compound = (beam[1] - beam[0]) + (target[1] - target[0])
+
+        block = self.block(z_compound, n_compound)
+        entrance = self.mass_excess(beam[0], beam[1] - beam[0]) + self.mass_excess(target[0], target[1] - target[0])
+
+        return entrance - (block + block[::-1, ::-1])
+
+    def thresholds(self, beam: tuple[int, int], target: tuple[int, int], couloumb: float) -> numpy.ndarray:
+        '''
+        Thresholds of all channels in the same way as Reaction.reaction_threshold:
+        Coulomb barrier of entrance channel for exothermic ones.
+        '''
+        quits = self.quits(beam, target)
+
+        beam_mass = beam[0] * PROTON_MASS + (beam[1] - beam[0]) * NEUTRON_MASS
+        target_mass = target[0] * PROTON_MASS + (target[1] - target[0]) * NEUTRON_MASS
+
+        endothermic = numpy.abs(quits) * (1 + beam_mass / target_mass + numpy.abs(quits) / (2 * target_mass))
+        return numpy.where(quits > 0, couloumb, endothermic)
+
+    def open_channels(self, beam: tuple[int, int], target: tuple[int, int], beam_energy: float,
+                      couloumb: float) -> list[tuple[int, int]]:
+        '''
+        (Z, A) of all fragments, which ground-state channels are open.
+        '''
+        charges, neutrons = numpy.nonzero(self.thresholds(beam, target, couloumb) <= beam_energy)
+        return list(zip(charges.tolist(), (charges + neutrons).tolist()))
+
+
+@functools.lru_cache(maxsize=1)
+def default_table() -> MassTable:
+    return MassTable(default_index())
+
+
+if __name__ == '__main__':
+    pass
@@ -2,24 +2,145 @@ import numpy
 
 from business.locus import Locus
 from business.decoding import Decoder
+from business.sparse import SparseMatrix
+from business.pyramid import Pyramid
 from business.analysis import Spectrum, SpectrumAnalyzer
 from business.physics import Nuclei, Reaction, CrossSection
 
 
 class Matrix:
-    def __init__(self, decoder: Decoder) -> None:
+    def __init__(self, decoder: Decoder, sparse: bool = False) -> None:
+        '''
+        E-dE matrix with its experiment conditions.\n
+        Sparse matrix keeps in memory only occupied cells, content
+        of decoded file is released after sparse form is built.
+        '''
         self.decoder = decoder
-        self.numbers = decoder.get_matrix()
+
+        numbers = decoder.get_matrix()
+        self.__numbers: numpy.ndarray | SparseMatrix = SparseMatrix.from_dense(numbers) if sparse else numbers
+        self.__is_decoded = True
+
         self.experiment = decoder.get_experiment()
         self.electronics = decoder.get_electronics()
 
-        self.angle = decoder.get_angle()
-        self.integrator_counts = decoder.get_integrator_counts()
-        self.integrator_constant = decoder.get_integrator_constant()
-        self.misscalculation = decoder.get_misscalculation()
+        self.__angle = decoder.get_angle()
+        self.__integrator_counts = decoder.get_integrator_counts()
+        self.__integrator_constant = decoder.get_integrator_constant()
+        self.__misscalculation: float = None
+        self.__pyramid: Pyramid = None
+
+        self.locuses: dict[Nuclei, Locus] = decoder.take_locuses(self.__numbers)
+        self.spectrums: dict[Nuclei, Spectrum] = decoder.take_spectrums(self.__numbers)
+
+        if sparse:
+            decoder.release()
+
+        self.clean()
+
+    @property
+    def is_dirty(self) -> bool:
+        '''
+        Whether matrix or anything it holds was changed since decoding or last saving.
+        '''
+        if self.__is_dirty or self.experiment.is_dirty or self.electronics.is_dirty:
+            return True
+
+        return any(self.spectrums[n].is_dirty for n in self.spectrums)
+
+    @property
+    def numbers(self) -> numpy.ndarray | SparseMatrix:
+        return self.__numbers
+
+    @numbers.setter
+    def numbers(self, val: numpy.ndarray | SparseMatrix) -> None:
+        self.__numbers = val
+        self.__is_decoded = False
+        self.__pyramid = None
+        self.__is_dirty = True
+
+    @property
+    def pyramid(self) -> Pyramid:
+        '''
+        Downsampled levels of matrix. Levels of decoded
+        file are used while numbers are not replaced.
+        '''
+        if self.__pyramid is None:
+            # Released decoder would load whole file again to compute levels.
+            is_stored = 'pyramid' in self.decoder.sections or not isinstance(self.__numbers, SparseMatrix)
+            self.__pyramid = self.decoder.get_pyramid() if self.__is_decoded and is_stored else Pyramid.from_matrix(self.__numbers)
+
+        return self.__pyramid
+
+    @property
+    def angle(self) -> float:
+        return self.__angle
+
+    @angle.setter
+    def angle(self, val: float) -> None:
+        self.__angle = val
+        self.__is_dirty = True
+
+    @property
+    def integrator_counts(self) -> int:
+        return self.__integrator_counts
+
+    @integrator_counts.setter
+    def integrator_counts(self, val: int) -> None:
+        self.__integrator_counts = val
+        self.__is_dirty = True
+
+    @property
+    def integrator_constant(self) -> float:
+        return self.__integrator_constant
+
+    @integrator_constant.setter
+    def integrator_constant(self, val: float) -> None:
+        self.__integrator_constant = val
+        self.__is_dirty = True
+
+    @property
+    def misscalculation(self) -> float:
+        '''
+        Telescope's efficiency. It is evaluated on first access,
+        because it needs to sum up whole matrix.
+        '''
+        if self.__misscalculation is None:
+            self.__misscalculation = self.decoder.get_coincidence() / self.numbers.sum()
+
+        return self.__misscalculation
+
+    @misscalculation.setter
+    def misscalculation(self, val: float) -> None:
+        self.__misscalculation = val
+        self.__is_dirty = True
+
+    def attach(self, decoder: Decoder) -> None:
+        '''
+        Points matrix to decoder of its newly written file,
+        so next savings patch the file in place.
+        '''
+        self.decoder = decoder
+
+        if isinstance(self.__numbers, SparseMatrix):
+            decoder.release()
+        else:
+            self.__numbers = decoder.get_matrix()
+            self.locuses = {nuclei: Locus(self.__numbers, self.locuses[nuclei].points) for nuclei in self.locuses}
 
-        self.locuses: dict[Nuclei, Locus] = decoder.take_locuses()
-        self.spectrums: dict[Nuclei, Spectrum] = decoder.take_spectrums()
+        self.__is_decoded = True
+        self.__pyramid = None
+
+    def clean(self) -> None:
+        '''
+        Marks matrix and everything it holds as saved.
+        '''
+        self.__is_dirty = False
+        self.experiment.clean()
+        self.electronics.clean()
+
+        for nuclei in self.spectrums:
+            self.spectrums[nuclei].clean()
     
     def to_workbook(self) -> str:
         beam = self.experiment.beam
@@ -53,6 +174,11 @@ class Matrix:
         reaction = self.__build_reaction(particle)
         spectrum_data = self.locuses[particle].to_spectrum()
         self.spectrums[particle] = Spectrum(reaction, self.angle, self.electronics, spectrum_data)
+        self.__is_dirty = True
+
+    def remove_locus(self, particle: Nuclei) -> None:
+        self.locuses.pop(particle)
+        self.__is_dirty = True
 
     def spectrum_of(self, particle: Nuclei) -> Spectrum:
         if particle in [self.spectrums[n].reaction.fragment for n in self.spectrums]:
@@ -64,6 +190,7 @@ class Matrix:
             spectrum_data = locus.to_spectrum()
 
             self.spectrums[particle] = Spectrum(reaction, self.angle, self.electronics, spectrum_data)
+            self.__is_dirty = True
             return self.spectrums[particle]
         
         raise ValueError(f'There is no spectrum of {particle} fragment.')
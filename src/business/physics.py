@@ -1,41 +1,107 @@
 from __future__ import annotations
 
+import functools
 import numpy
 from business.informer import Informator, NAME2CHARGE
+from business.masstable import default_table
+from business.levels import LevelScheme
+
+
+KINEMATIC_TABLE_ROWS = 1024  # angles
+
+RANGE_TABLE_SIZE   = 512
+RANGE_TABLES_CACHE = 64
+RANGE_MAX_ENERGY   = 200  # MeV per nuclon, non-relativistic velocity is still acceptable
+
+ELECTRON_MASS       = 0.511     # MeV
+REDUCED_PLANCK      = 6.582e-22 # MeV * s
+LIGHTSPEED          = 3e10      # cm / s
+FINE_STRUCTURE      = 1 / 137   # dimensionless
+AVOGADRO            = 6.02e23   # mol^-1
+HYDROGEN_IONIZATION = 13.6e-6   # MeV
 
 
 class Nuclei:
-    def __init__(self, charge: int, nuclons: int) -> None:
+    '''
+    Nuclei with charge and count of nuclons.\n
+    Instances are interned by (charge, nuclons), so nuclei is checked in
+    database only once, and data of database is read on first access.
+    '''
+    __slots__ = ('charge', 'nuclons', 'name', '__key', '__mass_excess', '__states', '__levels', '__spins', '__wigner_widths', '__radius')
+    __interned: dict[tuple[int, int], Nuclei] = dict()
+
+    def __new__(cls, charge: int, nuclons: int) -> Nuclei:
+        key = (charge, nuclons)
+        if key in cls.__interned:
+            return cls.__interned[key]
+
         if not Informator.is_exist(charge, nuclons):
             raise ValueError(f'Not such a nuclei with z={charge} and a={nuclons}')
 
-        self.nuclons = nuclons
-        self.charge = charge
-        self.name = Informator.name(self.charge, self.nuclons)
+        instance = super().__new__(cls)
+        instance.charge = charge
+        instance.nuclons = nuclons
+        instance.name = Informator.name(charge, nuclons)
+        instance.__key = 1000 * charge + nuclons
+
+        instance.__mass_excess = None
+        instance.__states = None
+        instance.__levels = None
+        instance.__spins = None
+        instance.__wigner_widths = None
+        instance.__radius = None
+
+        # Concurrent constructions of new nuclei agree on one instance.
+        return cls.__interned.setdefault(key, instance)
+
+    def __getnewargs__(self) -> tuple[int, int]:
+        return (self.charge, self.nuclons)
 
     @property
     def mass_excess(self) -> float:
-        return Informator.mass_excess(self.charge, self.nuclons)
+        if self.__mass_excess is None:
+            self.__mass_excess = Informator.mass_excess(self.charge, self.nuclons)
+
+        return self.__mass_excess
     
     @property
     def states(self) -> list[float]:
-        return Informator.states(self.charge, self.nuclons)
+        if self.__states is None:
+            self.__states = tuple(Informator.states(self.charge, self.nuclons))
+
+        return list(self.__states)
+
+    @property
+    def levels(self) -> LevelScheme:
+        if self.__levels is None:
+            self.__levels = LevelScheme(self.states)
+
+        return self.__levels
     
     @property
     def spins(self) -> list[tuple[float, bool]]:
-        return Informator.spins(self.charge, self.nuclons)
+        if self.__spins is None:
+            self.__spins = tuple(Informator.spins(self.charge, self.nuclons))
+
+        return list(self.__spins)
     
     @property
     def wigner_widths(self) -> list[float]:
-        return Informator.wigner_widths(self.charge, self.nuclons)
+        if self.__wigner_widths is None:
+            self.__wigner_widths = tuple(Informator.wigner_widths(self.charge, self.nuclons))
+
+        return list(self.__wigner_widths)
     
     @property
     def radius(self) -> float:
-        fermi = 1.28e-13 # cm
-        return fermi * numpy.cbrt(self.nuclons) # cm
+        if self.__radius is None:
+            fermi = 1.28e-13 # cm
+            self.__radius = fermi * numpy.cbrt(self.nuclons) # cm
+
+        return self.__radius
     
     def __hash__(self) -> int:
-        return hash(self.name)
+        return self.__key
 
     def __repr__(self) -> str:
         return self.name
@@ -44,7 +110,13 @@ class Nuclei:
         return self.name
     
     def __eq__(self, other: Nuclei) -> bool:
-        return self.nuclons == other.nuclons and self.charge == other.charge
+        if self is other:
+            return True
+
+        if not isinstance(other, Nuclei):
+            return NotImplemented
+
+        return self.__key == other.__key
     
     def __add__(self, other: Nuclei) -> Nuclei:
         return Nuclei(self.charge + other.charge, self.nuclons + other.nuclons)
@@ -87,16 +159,80 @@ class Nuclei:
         return None
 
 
+class KinematicTable:
+    '''
+    Fragment energies of residual states of reaction at requested
+    lab angles. Rows of angles are calculated at first request
+    in one vectorized call and stored for the next ones.
+    '''
+    def __init__(self, reaction: Reaction) -> None:
+        self.reaction = reaction
+        self.states = numpy.array(reaction.residual_states, dtype=numpy.float64)
+        self.rows: dict[float, numpy.ndarray] = dict()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __repr__(self) -> str:
+        return f'KinematicTable(angles: {len(self.rows)}, states: {len(self.states)})'
+
+    def energies(self, fragment_angles: numpy.ndarray) -> numpy.ndarray:
+        '''
+        Grid of angles x residual states, same as Reaction.fragment_energies.
+        Only KINEMATIC_TABLE_ROWS last calculated angles are kept.
+        '''
+        angles = numpy.atleast_1d(numpy.asarray(fragment_angles, dtype=numpy.float64)).tolist()
+
+        missed = list(dict.fromkeys([angle for angle in angles if angle not in self.rows]))
+        if len(missed) != 0:
+            calculated = self.reaction.fragment_energies(self.states, missed)
+            calculated.flags.writeable = False
+
+            self.rows.update(zip(missed, calculated))
+
+        rows = [self.rows[angle] for angle in angles]
+
+        # Rows are kept in order of calculation, the oldest ones are dropped.
+        while len(self.rows) > KINEMATIC_TABLE_ROWS:
+            del self.rows[next(iter(self.rows))]
+
+        if len(rows) == 1:
+            return rows[0][numpy.newaxis, :]
+
+        return numpy.stack(rows)
+
+
 class Reaction:
-    def __init__(self, beam: Nuclei, target: Nuclei, fragment: Nuclei, beam_energy: float) -> None:
+    def __init__(self, beam: Nuclei, target: Nuclei, fragment: Nuclei, beam_energy: float, relativistic: bool = False) -> None:
+        '''
+        Two-body nuclear reaction target(beam, fragment)residual.\n
+        In relativistic mode kinematics is evaluated with total energies
+        and momenta instead of non-relativistic approximation.
+        '''
         self.beam = beam
         self.target = target
         self.fragment = fragment
-        self.beam_energy = beam_energy
+        self.relativistic = relativistic
+        self.__beam_energy = beam_energy
 
         self.residual = self.__residual_nuclei()
         self.residual_states = self.__residual_states()
 
+        self.__table: KinematicTable | None = None
+        self.__table_key: tuple | None = None
+
+    @property
+    def beam_energy(self) -> float:
+        return self.__beam_energy
+
+    @beam_energy.setter
+    def beam_energy(self, val: float) -> None:
+        '''
+        States of residual nuclei are cut by thresholds again for new energy.
+        '''
+        self.__beam_energy = val
+        self.residual_states = self.__residual_states()
+
     @property
     def is_elastic(self) -> bool:
         return self.beam == self.fragment
@@ -117,41 +253,96 @@ class Reaction:
         return self.beam + self.target - self.fragment
     
     def __residual_states(self) -> list[float]:
-        all_states = self.residual.states
+        '''
+        States of residual nuclei up to the first one, which threshold is greater
+        than beam energy. Thresholds of endothermic channels grow with excitation,
+        so open states are levels below the highest excitation, which solves
+        |Q| * (1 + m / M) + Q^2 / 2M = E. Levels of ensdf are sorted by energy.
+        '''
+        quit = self.reaction_quit(0)
+        if quit > 0 and self.couloumb_potential() > self.beam_energy:
+            return []
 
-        possible = []
-        for state in all_states:
-            if self.reaction_threshold(state) > self.beam_energy:
-                break
-            
-            possible.append(state)
+        linear = 1 + self.beam.mass() / self.target.mass()
+        square = 1 / (2 * self.target.mass())
+        highest = quit + (numpy.sqrt(linear ** 2 + 4 * square * self.beam_energy) - linear) / (2 * square)
 
-        return possible
+        return self.residual.levels.below(highest).tolist()
 
     def reaction_quit(self, residual_state: float = 0) -> float:
         q0 = (self.beam.mass_excess + self.target.mass_excess) - (self.fragment.mass_excess + self.residual.mass_excess)
         return q0 - residual_state
     
     def reaction_threshold(self, residual_state: float = 0) -> float:
-        if self.reaction_quit(residual_state) > 0:
-            return self.couloumb_potential()
+        return float(self.reaction_thresholds(numpy.array([residual_state]))[0])
+
+    def reaction_thresholds(self, residual_states: numpy.ndarray) -> numpy.ndarray:
+        quits = self.reaction_quit(0) - residual_states
 
         brackets = 1 + (self.beam.mass() / self.target.mass())
-        brackets += (abs(self.reaction_quit(residual_state)) / (2 * self.target.mass()))
+        brackets = brackets + numpy.abs(quits) / (2 * self.target.mass())
 
-        return abs(self.reaction_quit(residual_state)) * brackets
+        return numpy.where(quits > 0, self.couloumb_potential(), numpy.abs(quits) * brackets)
     
     def cm_energy(self) -> float:
         to_system = self.beam.mass() / (self.beam.mass() + self.target.mass()) * self.beam_energy
         return self.beam_energy - to_system
     
     def fragment_energy(self, residual_state: float, fragment_angle: float) -> float:
+        return float(self.fragment_energies(residual_state, fragment_angle)[0, 0])
+    
+    def residual_energy(self, residual_state: float, fragment_angle: float) -> float:
+        return float(self.residual_energies(residual_state, fragment_angle)[0, 0])
+    
+    def residual_angle(self, residual_state: float, fragment_angle: float) -> float:
+        return float(self.residual_angles(residual_state, fragment_angle)[0, 0])
+
+    def fragment_energies(self, residual_states: numpy.ndarray, fragment_angles: numpy.ndarray) -> numpy.ndarray:
+        '''
+        Energies of fragment on grid of lab angles (in degrees) x residual states.
+        Kinematically forbidden cells are NaN.
+        '''
+        return self.fragment_energy_branches(residual_states, fragment_angles)[0]
+
+    def kinematic_table(self) -> KinematicTable:
+        '''
+        Table of fragment energies of residual states, that is dropped
+        only after change of beam energy, nuclei, residual states or mode.
+        '''
+        key = (self.beam_energy, self.beam, self.target, self.fragment, self.relativistic, tuple(self.residual_states))
+        if self.__table is None or self.__table_key != key:
+            self.__table = KinematicTable(self)
+            self.__table_key = key
+
+        return self.__table
+
+    def tabulated_energies(self, fragment_angles: numpy.ndarray) -> numpy.ndarray:
+        '''
+        Energies of fragment for all residual states on grid of
+        lab angles x states, read from kinematic table. Rows of
+        single angle are read-only views of the table.
+        '''
+        return self.kinematic_table().energies(fragment_angles)
+
+    def fragment_energy_branches(self, residual_states: numpy.ndarray, 
+                                 fragment_angles: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
+        '''
+        Both solutions for fragment energy on grid of lab angles x residual states.
+        Second branch exists only in inverse kinematics, when fragment
+        is heavier than target and lab angles are below maximal one.
+        '''
+        states = numpy.atleast_1d(numpy.asarray(residual_states, dtype=numpy.float64))
+        angles = numpy.atleast_1d(numpy.asarray(fragment_angles, dtype=numpy.float64))[:, numpy.newaxis] * numpy.pi / 180
+
+        if self.relativistic:
+            return self.__relativistic_branches(states, angles)
+
         r = Reaction.__r_factor(
             self.beam.mass(), 
             self.beam_energy, 
             self.fragment.mass(), 
             self.residual.mass(), 
-            fragment_angle * numpy.pi / 180
+            angles
         )
 
         s = Reaction.__s_factor(
@@ -159,37 +350,73 @@ class Reaction:
             self.beam_energy, 
             self.fragment.mass(), 
             self.residual.mass(), 
-            self.reaction_quit(residual_state)
+            self.reaction_quit(0) - states
         )
 
-        return (r + numpy.sqrt(r ** 2 + s)) ** 2
-    
-    def residual_energy(self, residual_state: float) -> float:
-        r = Reaction.__r_factor(
-            self.beam.mass(),
-            self.beam_energy, 
-            self.residual.mass(),
-            self.fragment.mass(),
-            self.residual_angle(residual_state)
-        )
+        with numpy.errstate(invalid='ignore'):
+            roots = (r + numpy.sqrt(r ** 2 + s), r - numpy.sqrt(r ** 2 + s))
 
-        s = Reaction.__s_factor(
-            self.beam.mass(),
-            self.beam_energy,
-            self.residual.mass(),
-            self.fragment.mass(),
-            self.reaction_quit(residual_state)
-        )
+        return tuple([numpy.where(root >= 0, root ** 2, numpy.nan) for root in roots])
 
-        return (r + numpy.sqrt(r ** 2 + s)) ** 2
-    
-    def residual_angle(self, residual_state: float, fragment_angle: float) -> float:
-        fragment_ears = self.fragment_energy(residual_state, fragment_angle)
-        energy_relation = numpy.sqrt(self.beam.mass() * self.beam_energy / (self.fragment.mass() * fragment_ears))
+    def __relativistic_branches(self, states: numpy.ndarray, angles: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
+        '''
+        Roots of W * E_b - P * p_b * cos(angle) = K for fragment momentum p_b, where W and P
+        are total energy and momentum of system and K = (W^2 - P^2 + m_b^2 - m_B^2) / 2.
+        Mass of excited residual is taken so, that masses give Q-value of reaction.
+        '''
+        beam_mass, target_mass, fragment_mass = self.beam.mass(), self.target.mass(), self.fragment.mass()
+        residual_mass = beam_mass + target_mass - fragment_mass - (self.reaction_quit(0) - states)
 
-        return numpy.pi / 2 - numpy.arctan(
-            (energy_relation - numpy.cos(fragment_angle * numpy.pi / 180)) / numpy.sin(fragment_angle * numpy.pi / 180)
-        )
+        total_energy = self.beam_energy + beam_mass + target_mass
+        momentum = numpy.sqrt(self.beam_energy ** 2 + 2 * self.beam_energy * beam_mass)
+
+        cosine = numpy.cos(angles)
+        invariant = (total_energy ** 2 - momentum ** 2 + fragment_mass ** 2 - residual_mass ** 2) / 2
+        denominator = total_energy ** 2 - (momentum * cosine) ** 2
+
+        with numpy.errstate(invalid='ignore'):
+            discriminant = total_energy * numpy.sqrt(invariant ** 2 - fragment_mass ** 2 * denominator)
+
+        branches = []
+        for fragment_momentum in [(invariant * momentum * cosine + discriminant) / denominator,
+                                  (invariant * momentum * cosine - discriminant) / denominator]:
+            # Squaring adds roots with negative fragment energy, they are dropped.
+            is_physical = (fragment_momentum >= 0) & (invariant + momentum * cosine * fragment_momentum > 0)
+            energy = numpy.sqrt(fragment_momentum ** 2 + fragment_mass ** 2) - fragment_mass
+            branches.append(numpy.where(is_physical, energy, numpy.nan))
+
+        return tuple(branches)
+
+    def residual_energies(self, residual_states: numpy.ndarray, fragment_angles: numpy.ndarray) -> numpy.ndarray:
+        return self.kinematics(residual_states, fragment_angles)[1]
+
+    def residual_angles(self, residual_states: numpy.ndarray, fragment_angles: numpy.ndarray) -> numpy.ndarray:
+        return self.kinematics(residual_states, fragment_angles)[2]
+
+    def kinematics(self, residual_states: numpy.ndarray, fragment_angles: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        '''
+        Fragment energies, residual energies (from conservation of energy)
+        and recoil angles in radians on grid of lab angles x residual states.
+        '''
+        states = numpy.atleast_1d(numpy.asarray(residual_states, dtype=numpy.float64))
+        angles = numpy.atleast_1d(numpy.asarray(fragment_angles, dtype=numpy.float64))
+
+        fragment = self.fragment_energies(states, angles)
+        residual = self.beam_energy + self.reaction_quit(0) - states - fragment
+
+        radians = angles[:, numpy.newaxis] * numpy.pi / 180
+        if self.relativistic:
+            beam_momentum = numpy.sqrt(self.beam_energy ** 2 + 2 * self.beam_energy * self.beam.mass())
+            fragment_momentum = numpy.sqrt(fragment ** 2 + 2 * fragment * self.fragment.mass())
+
+            recoil = numpy.arctan2(fragment_momentum * numpy.sin(radians), beam_momentum - fragment_momentum * numpy.cos(radians))
+            return (fragment, residual, recoil)
+
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            energy_relation = numpy.sqrt(self.beam.mass() * self.beam_energy / (self.fragment.mass() * fragment))
+            recoil = numpy.pi / 2 - numpy.arctan((energy_relation - numpy.cos(radians)) / numpy.sin(radians))
+
+        return (fragment, residual, recoil)
     
     @staticmethod
     def __r_factor(beam_mass: float, beam_energy: float, 
@@ -235,37 +462,123 @@ class Struggling:
         self.stray = stray
         self.environ = environ
 
-    def energy_loss(self, energy: float, thickness: float, ro: float) -> float:
-        return self.specific_energy_loss(energy, ro) * thickness
-    
-    def specific_energy_loss(self, energy: float, ro: float) -> float:
-        electron_mass = 0.511 # MeV
-        reduced_planck = 6.582e-22 # MeV * s
-        lightspeed = 3e10 # cm / s
-        fine_structure = 1 / 137 # dimensionless
+    def energy_loss(self, energy: numpy.ndarray, thickness: float, ro: float) -> numpy.ndarray:
+        '''
+        Energy lost in layer of thickness (cm) and density ro (g / cm^3).
+        Stopped particles lose all energy.
+        '''
+        return energy - self.residual_energy(energy, thickness, ro)
+
+    def residual_energy(self, energy: numpy.ndarray, thickness: float, ro: float) -> numpy.ndarray:
+        '''
+        Energy after layer found by inversion of range-energy table:
+        E' = E(R(E) - thickness). Above table thin-layer approximation is used.
+        '''
+        energies, ranges = range_table(self.stray, self.environ, ro)
+        energy = numpy.asarray(energy, dtype=numpy.float64)
+
+        remain_range = self.range_of(energy, ro) - thickness
+        remain = numpy.interp(remain_range, ranges, energies)
 
-        e_power_4 = (reduced_planck * lightspeed * fine_structure) ** 2 # MeV^2 * cm^2
-        betta_power_2 = self.lorenz_parameter(energy) ** 2 # dimensionless
+        # Below the first node stopping power is taken constant, range is linear in energy.
+        remain = numpy.where(remain_range < ranges[0], remain_range * energies[0] / ranges[0], remain)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            thin = energy - self.specific_energy_loss(energy, ro) * thickness
 
-        common = 4 * numpy.pi * self.electrons_density(ro) * self.stray.charge ** 2
-        common *= e_power_4 / (electron_mass * betta_power_2)
+        remain = numpy.where(energy > energies[-1], thin, remain)
 
-        logarithm = numpy.log(2 * electron_mass * betta_power_2 / self.mean_environ_excitation())
-        relativistic = numpy.log(1 - betta_power_2) + betta_power_2
+        return numpy.maximum(remain, 0)
 
-        return common * (logarithm - relativistic) # MeV * cm^-1
+    def range_of(self, energy: numpy.ndarray, ro: float) -> numpy.ndarray:
+        '''
+        Path of particle (cm) until it stops. Outside of table stopping
+        power is taken constant and equal to one of the nearest node.
+        '''
+        energies, ranges = range_table(self.stray, self.environ, ro)
+        energy = numpy.asarray(energy, dtype=numpy.float64)
+
+        below = energy * ranges[0] / energies[0]
+        above = ranges[-1] + (energy - energies[-1]) / self.specific_energy_loss(energies[-1], ro)
+
+        inside = numpy.interp(energy, energies, ranges)
+        return numpy.where(energy < energies[0], below, numpy.where(energy > energies[-1], above, inside))
+    
+    def specific_energy_loss(self, energy: numpy.ndarray, ro: float) -> numpy.ndarray:
+        return stopping_powers([self.stray], self.environ, energy, ro)[0] # MeV * cm^-1
 
     def mean_environ_excitation(self) -> float:
-        hydrogen_ionization = 13.6e-6 # MeV
-        return hydrogen_ionization * self.environ.charge
+        return mean_excitation(self.environ)
     
     def electrons_density(self, ro: float) -> float:
-        avogadro = 6.02e23 # mol^-1
-        return self.environ.charge * ro * avogadro / self.environ.nuclons # electrons * cm^-3
+        return electrons_density(self.environ, ro)
     
-    def lorenz_parameter(self, energy: float) -> float:
-        #  dimensionless     MeV          MeV        
-        return numpy.sqrt(2 * energy / self.stray.mass())
+    def lorenz_parameter(self, energy: numpy.ndarray) -> numpy.ndarray:
+        return numpy.sqrt(betta_square(self.stray.mass(), energy))
+
+
+def mean_excitation(environ: Nuclei) -> float:
+    return HYDROGEN_IONIZATION * environ.charge # MeV
+
+def electrons_density(environ: Nuclei, ro: float) -> float:
+    return environ.charge * ro * AVOGADRO / environ.nuclons # electrons * cm^-3
+
+def betta_square(mass: numpy.ndarray, energy: numpy.ndarray) -> numpy.ndarray:
+    '''
+    Square of particle velocity in units of light speed.
+    '''
+    #       MeV                                    MeV
+    return 2 * numpy.asarray(energy, dtype=numpy.float64) / mass
+
+
+def stopping_powers(strays: list[Nuclei], environ: Nuclei, energy: numpy.ndarray, ro: float) -> numpy.ndarray:
+    '''
+    Bethe-Bloch dE / dx (MeV / cm) of several particles at the same energies,
+    array of shape (particles, *energy.shape). Factors of environ are calculated once.
+    '''
+    energy = numpy.asarray(energy, dtype=numpy.float64)
+    shape = (len(strays),) + (1,) * energy.ndim
+
+    charges = numpy.array([stray.charge for stray in strays], dtype=numpy.float64).reshape(shape)
+    masses = numpy.array([stray.mass() for stray in strays], dtype=numpy.float64).reshape(shape)
+
+    e_power_4 = (REDUCED_PLANCK * LIGHTSPEED * FINE_STRUCTURE) ** 2 # MeV^2 * cm^2
+
+    environ_factor = 4 * numpy.pi * electrons_density(environ, ro) * e_power_4 / ELECTRON_MASS # MeV^2 * cm^-1
+    betta_power_2 = betta_square(masses, energy) # dimensionless
+
+    logarithm = numpy.log(2 * ELECTRON_MASS * betta_power_2 / mean_excitation(environ))
+    relativistic = numpy.log(1 - betta_power_2) + betta_power_2
+
+    return environ_factor * charges ** 2 / betta_power_2 * (logarithm - relativistic)
+
+
+@functools.lru_cache(maxsize=RANGE_TABLES_CACHE)
+def range_table(stray: Nuclei, environ: Nuclei, ro: float) -> tuple[numpy.ndarray, numpy.ndarray]:
+    '''
+    Ranges (cm) on logarithmic grid of energies (MeV) as cumulative integral of
+    1 / (dE / dx). Grid starts at maximum of Bethe-Bloch formula, below it the formula
+    is unphysical and stopping power is taken constant, so range of the first node is E / S(E).
+    '''
+    struggling = Struggling(stray, environ)
+    top = RANGE_MAX_ENERGY * stray.nuclons
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        coarse = numpy.geomspace(top * 1e-6, top, RANGE_TABLE_SIZE)
+        powers = struggling.specific_energy_loss(coarse, ro)
+
+    start = coarse[numpy.argmax(numpy.where(numpy.isfinite(powers), powers, -numpy.inf))]
+
+    energies = numpy.geomspace(start, top, RANGE_TABLE_SIZE)
+    inverse = 1 / struggling.specific_energy_loss(energies, ro)
+
+    ranges = numpy.empty_like(energies)
+    ranges[0] = energies[0] * inverse[0]
+    ranges[1:] = ranges[0] + numpy.cumsum((inverse[1:] + inverse[:-1]) * numpy.diff(energies) / 2)
+
+    energies.flags.writeable = False
+    ranges.flags.writeable = False
+
+    return (energies, ranges)
 
 
 class CrossSection:
@@ -349,10 +662,59 @@ class CrossSection:
 
 
 class PhysicalExperiment:
-    def __init__(self, beam: Nuclei, target: Nuclei, beam_energy: float) -> None:
-        self.beam = beam
-        self.target = target
-        self.beam_energy = beam_energy
+    def __init__(self, beam: Nuclei, target: Nuclei, beam_energy: float, relativistic: bool = False) -> None:
+        '''
+        Conditions of experiment. Reactions of relativistic
+        experiment use relativistic kinematics.
+        '''
+        self.__beam = beam
+        self.__target = target
+        self.__beam_energy = beam_energy
+        self.__relativistic = relativistic
+        self.__is_dirty = False
+
+    @property
+    def is_dirty(self) -> bool:
+        return self.__is_dirty
+
+    @property
+    def beam(self) -> Nuclei:
+        return self.__beam
+    
+    @beam.setter
+    def beam(self, val: Nuclei) -> None:
+        self.__beam = val
+        self.__is_dirty = True
+
+    @property
+    def target(self) -> Nuclei:
+        return self.__target
+    
+    @target.setter
+    def target(self, val: Nuclei) -> None:
+        self.__target = val
+        self.__is_dirty = True
+
+    @property
+    def beam_energy(self) -> float:
+        return self.__beam_energy
+    
+    @beam_energy.setter
+    def beam_energy(self, val: float) -> None:
+        self.__beam_energy = val
+        self.__is_dirty = True
+
+    @property
+    def relativistic(self) -> bool:
+        return self.__relativistic
+    
+    @relativistic.setter
+    def relativistic(self, val: bool) -> None:
+        self.__relativistic = val
+        self.__is_dirty = True
+
+    def clean(self) -> None:
+        self.__is_dirty = False
 
     def __str__(self) -> str:
         return f'{self.target} + {self.beam} at {self.beam_energy} MeV.'
@@ -361,28 +723,36 @@ class PhysicalExperiment:
         return str(self)
 
     def possible_channels(self) -> list[Reaction]:
+        '''
+        Pick-up, elastic and stripping channels with light particles, which are
+        open for beam energy. Thresholds of all channels are taken from mass table at once.
+        '''
         queue = [Nuclei(0, 1), Nuclei(1, 1), Nuclei(1, 2), Nuclei(1, 3), Nuclei(2, 3), Nuclei(2, 4)]
         if self.beam in queue:
             queue = queue[:queue.index(self.beam) + 1]
 
-        elastic = Reaction(self.beam, self.target, self.beam, self.beam_energy)
-        current = None
-        
-        pick_up = []
-        for i in queue:
-            try:
-                current = self.create_reaction(self.beam - i)
-                pick_up.append(current)
-            except:
-                continue
-
-        stripped = []
-        for i in queue:
-            try:
-                current = self.create_reaction(self.beam + i)
-                stripped.append(current)
-            except:
-                continue
+        elastic = Reaction(self.beam, self.target, self.beam, self.beam_energy, self.relativistic)
+
+        beam = (self.beam.charge, self.beam.nuclons)
+        target = (self.target.charge, self.target.nuclons)
+        opened = set(default_table().open_channels(beam, target, self.beam_energy, elastic.couloumb_potential()))
+
+        def open_reactions(fragments: list[tuple[int, int]]) -> list[Reaction]:
+            collected = []
+            for fragment in fragments:
+                if fragment not in opened:
+                    continue
+
+                # Channels, which residual levels can not be parsed, are skipped.
+                try:
+                    collected.append(Reaction(self.beam, self.target, Nuclei(*fragment), self.beam_energy, self.relativistic))
+                except ValueError:
+                    continue
+
+            return collected
+
+        pick_up = open_reactions([(self.beam.charge - i.charge, self.beam.nuclons - i.nuclons) for i in queue])
+        stripped = open_reactions([(self.beam.charge + i.charge, self.beam.nuclons + i.nuclons) for i in queue])
 
         return pick_up + [elastic] + stripped
 
@@ -391,7 +761,7 @@ class PhysicalExperiment:
         if fragment.charge > compound.charge:
             raise ValueError('Ejectile particle greater than reaction components.')
         
-        hypotese = Reaction(self.beam, self.target, fragment, self.beam_energy)
+        hypotese = Reaction(self.beam, self.target, fragment, self.beam_energy, self.relativistic)
         if hypotese.reaction_threshold() > self.beam_energy:
             raise ValueError('Energy of beam is not enough for produce reaction.')
 
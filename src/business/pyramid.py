@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import struct
+import numpy
+
+from business.sparse import SparseMatrix
+
+
+LEVELS     = [2, 4, 8]
+LEVEL_HEAD = struct.Struct('<HHH')  # factor, dE size, E size
+LEVEL_CELL = numpy.dtype('<u4')
+
+
+def downsample(matrix: numpy.ndarray | SparseMatrix, factor: int) -> numpy.ndarray:
+    '''
+    Sums up blocks of factor x factor cells. Blocks at edges of matrix,
+    which sizes are not multiple of factor, are summed up partially.
+    '''
+    de_size, e_size = matrix.shape
+    de_blocks, e_blocks = -(-de_size // factor), -(-e_size // factor)
+
+    if isinstance(matrix, SparseMatrix):
+        rows, cols, data = matrix.cells()
+        blocks = (rows // factor) * e_blocks + cols // factor
+        summed = numpy.bincount(blocks, weights=data, minlength=de_blocks * e_blocks)
+        return summed.astype(numpy.uint64).reshape(de_blocks, e_blocks)
+
+    # Whole blocks are summed over reshaped view, partial edge blocks separately.
+    de_whole, e_whole = de_size // factor, e_size // factor
+    de_cut, e_cut = de_whole * factor, e_whole * factor
+
+    summed = numpy.zeros((de_blocks, e_blocks), dtype=numpy.uint64)
+    whole = matrix[:de_cut, :e_cut].reshape(de_whole, factor, e_whole, factor)
+    whole.sum(axis=(1, 3), dtype=numpy.uint64, out=summed[:de_whole, :e_whole])
+
+    if e_cut < e_size:
+        summed[:de_whole, -1] = matrix[:de_cut, e_cut:].reshape(de_whole, factor, e_size - e_cut).sum(axis=(1, 2), dtype=numpy.uint64)
+
+    if de_cut < de_size:
+        summed[-1, :e_whole] = matrix[de_cut:, :e_cut].reshape(de_size - de_cut, e_whole, factor).sum(axis=(0, 2), dtype=numpy.uint64)
+
+    if de_cut < de_size and e_cut < e_size:
+        summed[-1, -1] = matrix[de_cut:, e_cut:].sum(dtype=numpy.uint64)
+
+    return summed
+
+
+class Pyramid:
+    '''
+    Downsampled levels of E-dE matrix for overview drawing.\n
+    Level of factor f holds sums of f x f blocks of channels.
+    '''
+    def __init__(self, shape: tuple[int, int], levels: dict[int, numpy.ndarray]) -> None:
+        self.shape = shape
+        self.levels = levels
+
+    def __repr__(self) -> str:
+        return f'Pyramid(shape: {self.shape}, factors: {sorted(self.levels)})'
+
+    @staticmethod
+    def from_matrix(matrix: numpy.ndarray | SparseMatrix, factors: list[int] = LEVELS) -> Pyramid:
+        levels = dict()
+        for factor in factors:
+            summed = downsample(matrix, factor)
+            levels[factor] = numpy.minimum(summed, numpy.iinfo(LEVEL_CELL).max).astype(LEVEL_CELL)
+
+        return Pyramid(matrix.shape, levels)
+
+    @staticmethod
+    def from_bytes(content: memoryview | bytes, shape: tuple[int, int]) -> Pyramid:
+        offset = 0
+        count = struct.unpack_from('<H', content, offset)[0]
+        offset += 2
+
+        levels = dict()
+        for _ in range(count):
+            factor, de_size, e_size = LEVEL_HEAD.unpack_from(content, offset)
+            offset += LEVEL_HEAD.size
+
+            cells = numpy.frombuffer(content, dtype=LEVEL_CELL, count=de_size * e_size, offset=offset)
+            levels[factor] = cells.reshape(de_size, e_size)
+            levels[factor].flags.writeable = False
+            offset += cells.nbytes
+
+        return Pyramid(shape, levels)
+
+    def to_bytes(self) -> bytearray:
+        factors = sorted(self.levels)
+        buffer = bytearray(struct.pack('<H', len(factors)))
+
+        for factor in factors:
+            level = self.levels[factor]
+            buffer += LEVEL_HEAD.pack(factor, *level.shape)
+            buffer += level.astype(LEVEL_CELL, copy=False).tobytes()
+
+        return buffer
+
+    def factor_for(self, visible: tuple[int, int], pixels: tuple[int, int]) -> int:
+        '''
+        The coarsest factor, which still gives at least one cell
+        per screen pixel in visible (dE, E) channels range.
+        '''
+        suitable = [f for f in self.levels if visible[0] / f >= pixels[0] and visible[1] / f >= pixels[1]]
+        return max(suitable, default=1)
+
+    def level(self, factor: int, matrix: numpy.ndarray | SparseMatrix) -> numpy.ndarray:
+        '''
+        Level of given factor, factor 1 is the matrix itself.
+        '''
+        return numpy.asarray(matrix) if factor == 1 else self.levels[factor]
+
+    def edges(self, factor: int) -> tuple[numpy.ndarray, numpy.ndarray]:
+        '''
+        Borders of level cells in matrix channels along E and dE axes.
+        '''
+        de_size, e_size = self.shape
+        e_edges = numpy.minimum(numpy.arange(0, e_size + factor, factor), e_size)
+        de_edges = numpy.minimum(numpy.arange(0, de_size + factor, factor), de_size)
+
+        return (e_edges, de_edges)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,95 @@
+import struct
+import numpy
+
+
+# Declarative layout of dSigma file (see format.txt). Fixed blocks are lists of
+# (field, format) pairs compiled to one struct.Struct, so every block is packed
+# or unpacked by one call. Repeated records are numpy structured dtypes.
+HEADER_FIELDS = [
+    # Physics area
+    ('beam_charge', 'B'), ('beam_nuclons', 'B'), ('target_charge', 'B'), ('target_nuclons', 'B'),
+    ('beam_energy', 'f'), ('detector_angle', 'f'),
+    # Electronics area
+    ('e_detector_thickness', 'f'), ('e_detector_madeof', '4s'), ('e_detector_resolution', 'f'),
+    ('de_detector_thickness', 'f'), ('de_detector_madeof', '4s'), ('de_detector_resolution', 'f'),
+    # Cross-section valuable, details area
+    ('integrator_counts', 'I'), ('coincidence', 'I'), ('integrator_constant', 'f'),
+    ('collimator_radius', 'f'), ('target_detector_distance', 'f'),
+    # Matrix area
+    ('e_size', 'H'), ('de_size', 'H')
+]
+LOCUSES_FIELDS  = [('locuses_count', 'H')]
+LOCUS_FIELDS    = [('charge', 'B'), ('nuclons', 'B'), ('points_count', 'I')]
+SPECTRUM_FIELDS = [('charge', 'B'), ('nuclons', 'B'), ('calib_e0', 'f'), ('calib_k', 'f'), ('peaks_count', 'H')]
+
+POINT_FIELDS = [('e', '<u2'), ('de', '<u2')]
+PEAK_FIELDS  = [('state', '<f4'), ('center', '<f4'), ('fwhm', '<f4'), ('area', '<f4'), ('gauss_or_lorentz', 'i1')]
+
+
+class Block:
+    '''
+    Fixed block of little-endian fields compiled to struct.Struct.
+    '''
+    def __init__(self, fields: list[tuple[str, str]]) -> None:
+        self.names = [name for name, _ in fields]
+        self.struct = struct.Struct('<' + ''.join([form for _, form in fields]))
+
+        self.offsets = dict()
+        offset = 0
+        for name, form in fields:
+            self.offsets[name] = offset
+            offset += struct.calcsize('<' + form)
+
+    def __repr__(self) -> str:
+        return f'Block({self.struct.format}, size: {self.size})'
+
+    @property
+    def size(self) -> int:
+        return self.struct.size
+
+    def unpack(self, buffer, offset: int = 0) -> dict[str, int | float | bytes]:
+        return dict(zip(self.names, self.struct.unpack_from(buffer, offset)))
+
+    def pack(self, fields: dict[str, int | float | bytes]) -> bytes:
+        return self.struct.pack(*[fields[name] for name in self.names])
+
+    def pack_into(self, buffer, offset: int, fields: dict[str, int | float | bytes]) -> None:
+        self.struct.pack_into(buffer, offset, *[fields[name] for name in self.names])
+
+
+HEADER   = Block(HEADER_FIELDS)
+LOCUSES  = Block(LOCUSES_FIELDS)
+LOCUS    = Block(LOCUS_FIELDS)
+SPECTRUM = Block(SPECTRUM_FIELDS)
+
+POINT       = numpy.dtype(POINT_FIELDS)
+PEAK        = numpy.dtype(PEAK_FIELDS)
+MATRIX_CELL = numpy.dtype('<u4')
+
+MATRIX_START = HEADER.size
+
+
+def locuses_start(de_size: int, e_size: int) -> int:
+    return MATRIX_START + MATRIX_CELL.itemsize * de_size * e_size
+
+def locuses_size(points_counts: list[int]) -> int:
+    return LOCUSES.size + sum([LOCUS.size + POINT.itemsize * count for count in points_counts])
+
+def spectrums_size(peaks_counts: list[int]) -> int:
+    return sum([SPECTRUM.size + PEAK.itemsize * count for count in peaks_counts])
+
+def read_records(buffer, dtype: numpy.dtype, count: int, offset: int) -> numpy.ndarray:
+    '''
+    View over count records of buffer, decoded in one call.
+    '''
+    if count == 0:
+        return numpy.empty(0, dtype=dtype)
+
+    if offset + dtype.itemsize * count > len(buffer):
+        raise ValueError(f'Records are out of area bounds at offset {offset}.')
+
+    return numpy.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,181 @@
+from __future__ import annotations
+import numpy
+
+
+DENSE_BLOCK_COLUMNS = 256
+
+
+class SparseMatrix:
+    '''
+    E-dE matrix that keeps only occupied cells.\n
+    Cells are stored column by column (CSC layout), because locuses
+    are projected to E-axis by summing up dE-columns.
+    '''
+    def __init__(self, shape: tuple[int, int], indptr: numpy.ndarray, rows: numpy.ndarray, data: numpy.ndarray) -> None:
+        self.__shape = shape
+        self.__indptr = indptr
+        self.__rows = rows
+        self.__data = data
+
+    @staticmethod
+    def from_dense(matrix: numpy.ndarray) -> SparseMatrix:
+        '''
+        Cells are collected by blocks of columns, so temporary
+        index arrays never cover the whole matrix.
+        '''
+        matrix = numpy.asarray(matrix)
+
+        counts = numpy.count_nonzero(matrix, axis=0)
+        indptr = numpy.zeros(matrix.shape[1] + 1, dtype=numpy.int64)
+        numpy.cumsum(counts, out=indptr[1:])
+
+        rows = numpy.empty(indptr[-1], dtype=numpy.int32)
+        data = numpy.empty(indptr[-1], dtype=matrix.dtype)
+
+        for start in range(0, matrix.shape[1], DENSE_BLOCK_COLUMNS):
+            stop = min(start + DENSE_BLOCK_COLUMNS, matrix.shape[1])
+            block = matrix[:, start: stop].T
+
+            cols, block_rows = numpy.nonzero(block)
+            rows[indptr[start]: indptr[stop]] = block_rows
+            data[indptr[start]: indptr[stop]] = block[cols, block_rows]
+
+        return SparseMatrix(matrix.shape, indptr, rows, data)
+
+    @staticmethod
+    def from_cells(shape: tuple[int, int], rows: numpy.ndarray, cols: numpy.ndarray, data: numpy.ndarray) -> SparseMatrix:
+        '''
+        Builds matrix from list of cells. Repeated cells are added up.
+        '''
+        keys = cols.astype(numpy.int64) * shape[0] + rows
+        unique, inverse = numpy.unique(keys, return_inverse=True)
+        summed = numpy.bincount(inverse, weights=data, minlength=len(unique)).astype(data.dtype)
+
+        nonzero = summed != 0
+        unique, summed = unique[nonzero], summed[nonzero]
+        cols, rows = unique // shape[0], unique % shape[0]
+
+        indptr = numpy.zeros(shape[1] + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(cols, minlength=shape[1]), out=indptr[1:])
+
+        return SparseMatrix(shape, indptr, rows.astype(numpy.int32), summed)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.__shape
+
+    @property
+    def size(self) -> int:
+        return self.__shape[0] * self.__shape[1]
+
+    @property
+    def dtype(self) -> numpy.dtype:
+        return self.__data.dtype
+
+    @property
+    def nnz(self) -> int:
+        '''
+        Count of occupied cells.
+        '''
+        return len(self.__data)
+
+    @property
+    def nbytes(self) -> int:
+        return self.__indptr.nbytes + self.__rows.nbytes + self.__data.nbytes
+
+    def __len__(self) -> int:
+        return self.__shape[0]
+
+    def __repr__(self) -> str:
+        return f'SparseMatrix(shape: {self.__shape}, occupied: {self.nnz})'
+
+    def __array__(self, dtype: numpy.dtype = None, copy: bool = None) -> numpy.ndarray:
+        dense = self.toarray()
+        return dense if dtype is None else dense.astype(dtype)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple) and len(key) == 2 and isinstance(key[1], (int, numpy.integer)):
+            return self.column(key[1])[key[0]]
+
+        return self.toarray()[key]
+
+    def __add__(self, other):
+        if isinstance(other, SparseMatrix):
+            if self.shape != other.shape:
+                raise ValueError(f'Can not add matrixes with shapes {self.shape} and {other.shape}.')
+
+            rows_1, cols_1, data_1 = self.cells()
+            rows_2, cols_2, data_2 = other.cells()
+
+            rows = numpy.concatenate([rows_1, rows_2])
+            cols = numpy.concatenate([cols_1, cols_2])
+            data = numpy.concatenate([data_1, data_2])
+
+            return SparseMatrix.from_cells(self.shape, rows, cols, data)
+
+        return self.toarray() + other
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def column(self, e_position: int) -> numpy.ndarray:
+        start, stop = self.__indptr[e_position], self.__indptr[e_position + 1]
+
+        column = numpy.zeros(self.__shape[0], dtype=self.dtype)
+        column[self.__rows[start: stop]] = self.__data[start: stop]
+        return column
+
+    def column_sums(self, columns: numpy.ndarray, starts: numpy.ndarray, stops: numpy.ndarray) -> numpy.ndarray:
+        '''
+        Sums of cells in rows [start, stop) of every column. Rows of column
+        are sorted, so cells of range are found by bisection of cell keys.
+        '''
+        height = self.__shape[0]
+        starts = numpy.clip(starts, 0, height)
+        stops = numpy.clip(stops, starts, height)
+
+        cols = numpy.repeat(numpy.arange(self.__shape[1], dtype=numpy.int64), numpy.diff(self.__indptr))
+        keys = cols * height + self.__rows
+
+        cumulative = numpy.zeros(len(self.__data) + 1, dtype=numpy.int64)
+        numpy.cumsum(self.__data, out=cumulative[1:])
+
+        columns = numpy.asarray(columns, dtype=numpy.int64)
+        lower = numpy.searchsorted(keys, columns * height + starts)
+        upper = numpy.searchsorted(keys, columns * height + stops)
+
+        return cumulative[upper] - cumulative[lower]
+
+    def cells(self) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        '''
+        Occupied cells as (rows, columns, values) arrays.
+        '''
+        cols = numpy.repeat(numpy.arange(self.__shape[1]), numpy.diff(self.__indptr))
+        return (self.__rows.copy(), cols, self.__data.copy())
+
+    def toarray(self) -> numpy.ndarray:
+        rows, cols, data = self.cells()
+
+        dense = numpy.zeros(self.__shape, dtype=self.dtype)
+        dense[rows, cols] = data
+        return dense
+
+    def copy(self) -> SparseMatrix:
+        return SparseMatrix(self.__shape, self.__indptr.copy(), self.__rows.copy(), self.__data.copy())
+
+    def sum(self, axis: int = None):
+        if axis is None:
+            return self.__data.sum()
+
+        rows, cols, data = self.cells()
+        if axis == 0:
+            return numpy.bincount(cols, weights=data, minlength=self.__shape[1]).astype(numpy.int64)
+
+        return numpy.bincount(rows, weights=data, minlength=self.__shape[0]).astype(numpy.int64)
+
+    def mean(self) -> float:
+        return self.__data.sum() / self.size
+
+
+if __name__ == '__main__':
+    pass
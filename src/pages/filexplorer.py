@@ -1,15 +1,14 @@
 import os
-from business.decoding import Decoder
+
+from business.catalog import Catalog
 
 
 class Sleuth:
     def __init__(self, main_directory: str) -> None:
         self.main = main_directory
     
-    def all_decoders(self) -> list[Decoder]:
-        directories = os.listdir(self.main)
-        files = self.only_ds(directories)
-        return [Decoder(file) for file in files]
+    def catalog(self) -> Catalog:
+        return Catalog(self.main, self.sort())
     
     def ds_names(self) -> list[str]:
         directories = os.listdir(self.main)
@@ -4,7 +4,9 @@ import imageio
 
 from business.matrix import Matrix
 from business.physics import Nuclei
+from business.decoding import Decoder
 from business.encoding import Encoder
+from business.campaign import CampaignLoader
 from business.matrixcontrol import MatrixAnalyzer
 
 from pages.cswindow import CSWindow
@@ -24,7 +26,7 @@ from PyQt5.QtCore import Qt, QSize, QMetaObject, QCoreApplication
 from PyQt5.QtWidgets import (
     QWidget, QMainWindow, QVBoxLayout, 
     QHBoxLayout, QComboBox, QPushButton, 
-    QFrame, QLabel, QFileDialog
+    QFrame, QLabel, QFileDialog, QProgressDialog
 )
 
 
@@ -289,6 +291,7 @@ class DrawDialog(QWidget):
         # DATA
         self.lum = lum
         self.matrix = matrix
+        self.image = numpy.log(numpy.asarray(self.matrix.numbers) + 1)
 
         self.selected_dots_x = []
         self.selected_dots_y = []
@@ -342,7 +345,7 @@ class DrawDialog(QWidget):
             self.window = InformWindow(f'There is no locuses in matrix of nuclei {nuclei}')
             self.window.show()
         else:
-            self.matrix.locuses.pop(nuclei)
+            self.matrix.remove_locus(nuclei)
             self.draw_lines()
 
     def cutting(self, event: MouseEvent) -> None:
@@ -367,12 +370,9 @@ class DrawDialog(QWidget):
 
     def draw_lines(self) -> None:
         self.axes.clear()
-        e_de = self.matrix.numbers[:]
-        e_de = e_de + 1
-
         locuses = self.matrix.locuses
 
-        self.axes.pcolor(numpy.log(e_de), vmin=0, vmax=self.lum)
+        self.axes.pcolormesh(self.image, vmin=0, vmax=self.lum)
         self.axes.plot(self.selected_dots_x, self.selected_dots_y, color='red')
         self.axes.scatter(self.selected_dots_x, self.selected_dots_y, color='red')
 
@@ -396,14 +396,19 @@ class Matrixograph(QMainWindow, Ui_Matrixograph):
 
         self.directory = directory
         self.sleuth = Sleuth(self.directory)
-        decoders = self.sleuth.all_decoders()
 
         # COLLECTING DATA AND PREPARE THEM TO SHOW
-        self.analyzer = MatrixAnalyzer([Matrix(d) for d in decoders])
-        self.__matrixes = [Matrix(d) for d in decoders]
+        loading = self.loading_dialog('Listing E-dE matrices...')
+        self.entries = self.sleuth.catalog().entries(lambda done, total: self.loading_step(loading, done, total))
+        loading.close()
+
+        self.__matrixes: list[Matrix] = [None] * len(self.entries)
+        self.__analyzer: MatrixAnalyzer = None
+        self.__images: dict[int, numpy.ndarray] = dict()
 
         self.current_index = 0
         self.luminiosity = 0
+        self.shown_factor = 1
 
         self.is_locuses_on = False
 
@@ -414,9 +419,10 @@ class Matrixograph(QMainWindow, Ui_Matrixograph):
         self.toolbar = NavigationToolbar2QT(self.view, self.matplotlib_layout)
         layout.addWidget(self.toolbar)
         layout.addWidget(self.view)
+        self.view.mpl_connect('button_release_event', self.refine_view)
 
         self.angles_box.currentTextChanged.connect(self.show_matrix)
-        self.angles_box.addItems(map(str, self.analyzer.angles))
+        self.angles_box.addItems(map(str, [entry.angle for entry in self.entries]))
 
         # EVENT HANDLING
         self.bright_up_button.clicked.connect(self.bright_up)
@@ -431,25 +437,105 @@ class Matrixograph(QMainWindow, Ui_Matrixograph):
         self.gif_button.clicked.connect(self.make_gif)
         self.save_button.clicked.connect(self.save)
 
+    @property
+    def analyzer(self) -> MatrixAnalyzer:
+        '''
+        Analyzer of all matrixes of directory. Matrixes, 
+        that were not shown yet, are decoded on first access.
+        '''
+        if self.__analyzer is None:
+            missing = [self.entries[i].path for i in range(len(self.entries)) if self.__matrixes[i] is None]
+
+            loading = self.loading_dialog('Loading E-dE matrices...')
+            loaded = CampaignLoader(missing, progress=lambda done, total: self.loading_step(loading, done, total)).load()
+            loading.close()
+
+            by_path = {matrix.decoder.path: matrix for matrix in loaded}
+            for i in range(len(self.entries)):
+                if self.__matrixes[i] is None:
+                    self.__matrixes[i] = by_path[self.entries[i].path]
+
+            self.__analyzer = MatrixAnalyzer(self.__matrixes)
+
+        return self.__analyzer
+
+    def matrix_at(self, index: int) -> Matrix:
+        if self.__matrixes[index] is None:
+            self.__matrixes[index] = Matrix(Decoder(self.entries[index].path))
+
+        return self.__matrixes[index]
+
+    def loading_dialog(self, text: str) -> QProgressDialog:
+        loading = QProgressDialog(text, None, 0, 0)
+        loading.setWindowTitle('dSigma — Loading')
+        loading.setWindowIcon(QIcon("./icon.ico"))
+        loading.show()
+
+        return loading
+
+    def loading_step(self, loading: QProgressDialog, done: int, total: int) -> None:
+        loading.setMaximum(total)
+        loading.setValue(done)
+        QCoreApplication.processEvents()
+
     def show_matrix(self) -> None:
         self.current_index = self.angles_box.currentIndex()
-        self.luminiosity = self.analyzer.matrixes[self.current_index].numbers.mean() * 2
+        self.luminiosity = self.matrix_at(self.current_index).numbers.mean() * 2
+        self.__images.clear()
         self.draw_e_de()
 
-    def draw_e_de(self) -> None:
+    def draw_e_de(self, keep_view: bool = False) -> None:
+        '''
+        Draws level of matrix pyramid, that fits canvas resolution
+        in visible range, so overview does not draw every channel.
+        '''
+        xlim, ylim = self.axes.get_xlim(), self.axes.get_ylim()
         self.axes.clear()
-        current = self.analyzer.matrixes[self.current_index]
-        e_de = current.numbers.copy()
-        e_de = e_de + 1
+        current = self.matrix_at(self.current_index)
 
-        self.axes.pcolor(numpy.log(e_de), vmin=0, vmax=self.luminiosity)
+        visible = (abs(ylim[1] - ylim[0]), abs(xlim[1] - xlim[0])) if keep_view else current.numbers.shape
+        self.shown_factor = current.pyramid.factor_for(visible, self.canvas_pixels())
+
+        if self.shown_factor not in self.__images:
+            self.__images[self.shown_factor] = self.image_of(current, self.shown_factor)
+
+        e_edges, de_edges = current.pyramid.edges(self.shown_factor)
+        self.axes.pcolormesh(e_edges, de_edges, self.__images[self.shown_factor], vmin=0, vmax=self.luminiosity)
 
         if self.is_locuses_on:
             self.draw_locuses()
 
+        if keep_view:
+            self.axes.set_xlim(xlim)
+            self.axes.set_ylim(ylim)
+
         self.axes.set_title(f'{current.experiment}\nLab system angle: {current.angle}')
         self.view.draw()
 
+    def image_of(self, matrix: Matrix, factor: int) -> numpy.ndarray:
+        '''
+        Logarithm of mean counts per channel in cells of pyramid level.
+        '''
+        level = matrix.pyramid.level(factor, matrix.numbers)
+        return numpy.log(level / factor ** 2 + 1)
+
+    def canvas_pixels(self) -> tuple[int, int]:
+        bbox = self.axes.get_window_extent()
+        return (max(int(bbox.height), 1), max(int(bbox.width), 1))
+
+    def refine_view(self, event: MouseEvent) -> None:
+        '''
+        Redraws matrix with level of another factor, when it was zoomed.
+        '''
+        if len(self.entries) == 0:
+            return
+
+        xlim, ylim = self.axes.get_xlim(), self.axes.get_ylim()
+        visible = (abs(ylim[1] - ylim[0]), abs(xlim[1] - xlim[0]))
+
+        if self.matrix_at(self.current_index).pyramid.factor_for(visible, self.canvas_pixels()) != self.shown_factor:
+            self.draw_e_de(keep_view=True)
+
     def change_locuses_status(self) -> None:
         self.is_locuses_on = not self.is_locuses_on
         self.draw_e_de()
@@ -458,7 +544,7 @@ class Matrixograph(QMainWindow, Ui_Matrixograph):
         colors = ['blue', 'red', 'green', 'yellow', 'white', 'darkred', 'purple']
         color_index = 0
 
-        locuses = self.analyzer.matrixes[self.current_index].locuses
+        locuses = self.matrix_at(self.current_index).locuses
         for n in locuses:
             xs = [locuses[n].points[j][0] for j in range(len(locuses[n].points))]
             ys = [locuses[n].points[j][1] for j in range(len(locuses[n].points))]
@@ -478,15 +564,15 @@ class Matrixograph(QMainWindow, Ui_Matrixograph):
         self.draw_e_de()
 
     def bright_default(self) -> None:
-        self.luminiosity = self.analyzer.matrixes[self.current_index].numbers.mean() * 2
+        self.luminiosity = self.matrix_at(self.current_index).numbers.mean() * 2
         self.draw_e_de()
 
     def locus_dialog(self) -> None:
-        self.window = DrawDialog(self.analyzer.matrixes[self.current_index], self.luminiosity)
+        self.window = DrawDialog(self.matrix_at(self.current_index), self.luminiosity)
         self.window.show()
 
     def open_workbook(self) -> None:
-        self.window = Workbooker(self.analyzer.matrixes[self.current_index].to_workbook())
+        self.window = Workbooker(self.matrix_at(self.current_index).to_workbook())
         self.window.show()
 
     def open_spectrograph(self) -> None:
@@ -498,7 +584,7 @@ class Matrixograph(QMainWindow, Ui_Matrixograph):
         self.window.show()
 
     def open_file_editor(self) -> None:
-        self.window = FileEditor(self.analyzer.matrixes[self.current_index])
+        self.window = FileEditor(self.matrix_at(self.current_index))
         self.window.show()
 
     def make_gif(self) -> None:
@@ -509,10 +595,10 @@ class Matrixograph(QMainWindow, Ui_Matrixograph):
             os.mkdir('Output')
 
         for mx in self.analyzer.matrixes:
-            e_de = mx.numbers.copy()
-            e_de += 1
+            factor = mx.pyramid.factor_for(mx.numbers.shape, self.canvas_pixels())
+            e_edges, de_edges = mx.pyramid.edges(factor)
 
-            self.axes.pcolor(numpy.log(e_de), vmin=0, vmax=self.luminiosity)
+            self.axes.pcolormesh(e_edges, de_edges, self.image_of(mx, factor), vmin=0, vmax=self.luminiosity)
             self.axes.set_title(f'{mx.experiment}\nLab system angle: {mx.angle}')
 
             self.axes.figure.savefig(f'Output/{mx.angle}.png', transparent = False,  facecolor = 'white')
@@ -530,26 +616,16 @@ class Matrixograph(QMainWindow, Ui_Matrixograph):
         self.draw_e_de()
 
     def save(self) -> None:
-        changed = self.__find_changed_ones()
+        changed = [matrix for matrix in self.__matrixes if matrix is not None and matrix.is_dirty]
 
         for matrix in changed:
             en = Encoder(matrix, self.directory)
             en.write_down()
+            matrix.clean()
 
         self.window = InformWindow('E-dE matrixes was saved succesfully.')
         self.window.show()
 
-    def __find_changed_ones(self) -> None:
-        found = []
-        for i in range(len(self.analyzer.matrixes)):
-            current = self.analyzer.matrixes[i]
-            ethalon = self.__matrixes[i]
-
-            if current.to_workbook() != ethalon.to_workbook():
-                found.append(self.analyzer.matrixes[i])
-
-        return found
-
 
 if __name__ == "__main__":
     pass
\ No newline at end of file